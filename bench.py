@@ -0,0 +1,224 @@
+"""
+Model / quantization A/B benchmark.
+
+Runs the same requirement set and prompt versions against each model and records
+tokens/sec, TTFT, peak RSS/CPU, parse success rate and test cases per minute,
+then writes a ranked JSON + Markdown report to outputs/. Each model is unloaded
+from the backend before the next one runs so memory measurements do not overlap.
+"""
+import os
+import json
+import time
+import statistics
+import threading
+from datetime import datetime
+
+import generate_test_case as gtc
+
+# ================== CONFIG ==================
+DEFAULT_MODELS = [gtc.MODEL_NAME]
+DEFAULT_REQUIREMENTS = ["clientA-data/other/requirements.json"]
+DEFAULT_VERSIONS = ["v2"]
+SAMPLE_INTERVAL = 0.25  # seconds
+BACKEND_PROCESS_NAMES = ("ollama",)
+# Models whose parse success rate falls below this are ranked after the rest
+MIN_PARSE_RATE = 0.8
+UNLOAD_TIMEOUT = 30  # seconds
+
+
+# ================== SYSTEM SAMPLER ==================
+class ProcessSampler(threading.Thread):
+    """
+    Samples system CPU and the RSS of the model backend processes while a model is
+    being benchmarked, keeping the peaks. Processes are listed again on every sample:
+    Ollama starts a runner per model on its first request. Falls back to this process
+    when no backend process is found (e.g. with the mock backend).
+    """
+
+    def __init__(self, process_names=BACKEND_PROCESS_NAMES, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.process_names = process_names
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.peak_rss_bytes = 0
+        self.peak_cpu_percent = 0.0
+        self.samples = 0
+
+    def _processes(self, psutil):
+        matched = []
+        for proc in psutil.process_iter(["name"]):
+            name = (proc.info.get("name") or "").lower()
+            if any(target in name for target in self.process_names):
+                matched.append(proc)
+        return matched or [psutil.Process()]
+
+    def run(self):
+        import psutil
+
+        psutil.cpu_percent(interval=None)
+        while not self.stop_event.wait(self.interval):
+            rss = 0
+            for proc in self._processes(psutil):
+                try:
+                    rss += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+            self.peak_cpu_percent = max(self.peak_cpu_percent, psutil.cpu_percent(interval=None))
+            self.samples += 1
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+# ================== BENCHMARK ==================
+def parses(text):
+    """
+    Whether the output yields at least one structured case, through JSON or the
+    markdown parser (parallel variations are not requested in JSON mode).
+    """
+    return any("raw_output" not in case for case in gtc.parse_outputs([text]))
+
+
+def count_cases(outputs):
+    return sum(1 for case in gtc.parse_outputs(outputs) if "raw_output" not in case)
+
+
+def benchmark_model(model, requirements, versions, mode="batch", num_cases=2, repeats=1):
+    """
+    Run every (requirement, version) pair against one model and aggregate the stats.
+    """
+    request_stats = []
+    outputs = []
+    sampler = ProcessSampler()
+    sampler.start()
+    start = time.perf_counter()
+    errors = 0
+    try:
+        for _ in range(repeats):
+            for requirement in requirements:
+                for version in versions:
+                    try:
+                        if mode == "parallel":
+                            outputs += gtc.generate_multiple_test_cases(
+                                requirement, version, num_cases=num_cases, use_stream=True,
+                                echo=False, model=model, stats=request_stats,
+                            )
+                        else:
+                            outputs.append(gtc.generate_batched_test_cases(
+                                requirement, version, use_stream=True,
+                                echo=False, model=model, stats=request_stats,
+                            ))
+                    except Exception as e:
+                        print(f"⚠️ {model} / {version}: {e}")
+                        errors += 1
+    finally:
+        wall_seconds = time.perf_counter() - start
+        sampler.stop()
+
+    parsed = sum(1 for text in outputs if parses(text))
+    cases = count_cases(outputs)
+    completed = [s for s in request_stats if s]
+    return {
+        "model": model,
+        "requests": len(outputs) + errors,
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 2),
+        "tokens_per_second": round(statistics.mean(s["tokens_per_second"] for s in completed), 2) if completed else 0.0,
+        "ttft_seconds_median": round(statistics.median(s["ttft_seconds"] for s in completed), 3) if completed else None,
+        "peak_rss_mb": round(sampler.peak_rss_bytes / (1024 ** 2), 1),
+        "peak_cpu_percent": sampler.peak_cpu_percent,
+        "parse_rate": round(parsed / len(outputs), 3) if outputs else 0.0,
+        "test_cases": cases,
+        "test_cases_per_minute": round(cases / (wall_seconds / 60), 2) if wall_seconds > 0 else 0.0,
+    }
+
+
+def unload_model(model):
+    """
+    Ask Ollama to drop the model from memory (keep_alive=0) so its runner does not
+    count towards the next model's RSS.
+    """
+    import requests
+
+    try:
+        requests.post(gtc.MODEL_API_URL, json={"model": model, "keep_alive": 0}, timeout=UNLOAD_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"⚠️ Could not unload {model}: {e}")
+
+
+def rank_results(results, min_parse_rate=MIN_PARSE_RATE):
+    """
+    Rank by test cases per minute, then tokens/sec. Models below the parse-rate floor
+    go after every model that meets it.
+    """
+    ranked = sorted(
+        results,
+        key=lambda r: (r["parse_rate"] >= min_parse_rate, r["test_cases_per_minute"], r["tokens_per_second"]),
+        reverse=True,
+    )
+    for rank, result in enumerate(ranked, start=1):
+        result["rank"] = rank
+        result["meets_parse_rate"] = result["parse_rate"] >= min_parse_rate
+    return ranked
+
+
+def write_report(report, output_dir=gtc.OUTPUT_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename_json = os.path.join(output_dir, f"bench_models_{timestamp_str}.json")
+    with open(filename_json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    filename_md = filename_json.replace(".json", ".md")
+    with open(filename_md, "w", encoding="utf-8") as f:
+        f.write("# 🏁 Model Benchmark\n\n")
+        f.write(f"**Versions:** {', '.join(report['versions'])}\n\n")
+        f.write(f"**Mode:** {report['mode']}\n\n")
+        f.write(f"**Requirements:** {len(report['requirements'])} × {report['repeats']} repeat(s)\n\n")
+        f.write(f"**Min parse rate:** {report['min_parse_rate']}\n\n")
+        f.write("| Rank | Model | Cases/min | Tokens/s | TTFT (s) | Peak RSS (MB) | Peak CPU % | Parsed | Errors |\n")
+        f.write("|---|---|---|---|---|---|---|---|---|\n")
+        for r in report["results"]:
+            flag = "" if r["meets_parse_rate"] else " ⚠️"
+            f.write(f"| {r['rank']} | {r['model']}{flag} | {r['test_cases_per_minute']} | {r['tokens_per_second']} | "
+                    f"{r['ttft_seconds_median']} | {r['peak_rss_mb']} | {r['peak_cpu_percent']} | "
+                    f"{r['parse_rate']:.0%} | {r['errors']} |\n")
+    return filename_json, filename_md
+
+
+def run_benchmark(models, requirement_files, versions, mode="batch", num_cases=2, repeats=1,
+                  min_parse_rate=MIN_PARSE_RATE, output_dir=gtc.OUTPUT_DIR):
+    requirements = []
+    for path in requirement_files:
+        with open(path, "r", encoding="utf-8") as f:
+            requirements.append(json.load(f))
+
+    results = []
+    for model in models:
+        print(f"🏃 Benchmarking {model} ...")
+        result = benchmark_model(model, requirements, versions, mode, num_cases, repeats)
+        unload_model(model)
+        print(f"   {result['test_cases_per_minute']} cases/min · {result['tokens_per_second']} tok/s · "
+              f"TTFT {result['ttft_seconds_median']}s · parsed {result['parse_rate']:.0%}")
+        results.append(result)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "api_url": gtc.MODEL_API_URL,
+        "mode": mode,
+        "versions": versions,
+        "requirements": requirement_files,
+        "repeats": repeats,
+        "min_parse_rate": min_parse_rate,
+        "results": rank_results(results, min_parse_rate),
+    }
+    return report, write_report(report, output_dir)
+
+
+# ================== MAIN ==================
+if __name__ == "__main__":
+    report, (filename_json, filename_md) = run_benchmark(DEFAULT_MODELS, DEFAULT_REQUIREMENTS, DEFAULT_VERSIONS)
+    print(f"✅ Benchmark report saved to {filename_json}")
+    print(f"🗒️ Markdown version saved to {filename_md}")
@@ -0,0 +1,369 @@
+"""
+Unified command line for the test case generator.
+
+    python cli.py ingest {convert,split,normalize,train,index,all}
+    python cli.py generate --requirement clientA-data/other/requirements.json --mode batch
+    python cli.py export outputs/testcase_v2_batch_....json --format xlsx
+    python cli.py parse raw_model_output.txt
+    python cli.py monitor
+    python cli.py serve
+    python cli.py bench imports
+    python cli.py bench models --models llama3.1:8b-instruct-q4_K_M llama3.2:3b-instruct-q4_K_M [--mock]
+
+Only argparse is imported up front; every subcommand imports what it needs when it runs.
+"""
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, "clientA-data", "scripts")
+
+DEFAULT_REQUIREMENT = "clientA-data/other/requirements.json"
+DEFAULT_DOCX = "clientA-data/raw/Login_TestCases.docx"
+DEFAULT_TEXT = "clientA-data/text/Login_TestCases.txt"
+DEFAULT_REQ_DIR = "clientA-data/text/requirements"
+DEFAULT_NORMALIZED_DIR = "clientA-data/text/normalized"
+DEFAULT_TRAIN_FILE = "clientA-data/train/Manual_TestCases.xlsx"
+DEFAULT_INDEX_DIR = "clientA-data/index"
+
+EXCEL_HEADERS = [
+    "Test Case ID", "Requirement ID", "Title",
+    "Pre-Conditions", "Test Steps", "Test Data",
+    "Expected Result", "Actual Result", "Status", "Remarks"
+]
+
+# Allowed startup cost on top of a bare `python -c pass`, so the check does not
+# depend on how slow the interpreter itself is to start on a given machine
+IMPORT_BUDGET_MS = 50
+
+
+def load_script(file_name):
+    """
+    Import one of the clientA-data/scripts files by path (self-hosted.py is not a valid module name).
+    """
+    import importlib.util
+
+    path = os.path.join(SCRIPTS_DIR, file_name)
+    name = os.path.splitext(file_name)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ================== INGEST ==================
+def cmd_ingest(args):
+    steps = ["convert", "split", "normalize", "train", "index"] if args.step == "all" else [args.step]
+    for step in steps:
+        if step == "convert":
+            os.makedirs(os.path.dirname(args.text), exist_ok=True)
+            load_script("convert_docx_to_txt.py").convert_docx_to_txt(args.docx, args.text)
+        elif step == "split":
+            load_script("split_requirements.py").split_requirements(args.text, args.req_dir)
+        elif step == "normalize":
+            load_script("normalize_requirements.py").normalize_all(args.req_dir, args.normalized_dir)
+        elif step == "train":
+            from deadline import Deadline
+
+            os.makedirs(os.path.dirname(args.train_file), exist_ok=True)
+            deadline = Deadline(args.deadline)
+            try:
+                load_script("self-hosted.py").generate_manual_testcases(
+                    args.normalized_dir, args.train_file, deadline=deadline)
+            finally:
+                deadline.close()
+        elif step == "index":
+            from example_index import build_index
+            count = build_index(args.train_file, args.normalized_dir, args.index_dir)
+            print(f"✅ Indexed {count} examples into {args.index_dir}")
+    return 0
+
+
+# ================== GENERATE ==================
+def cmd_generate(args):
+    import json
+    import generate_test_case as gtc
+
+    with open(args.requirement, "r", encoding="utf-8") as f:
+        requirement = json.load(f)
+
+    poller = server = None
+    if args.metrics_port:
+        import telemetry
+
+        poller = telemetry.TelemetryPoller()
+        poller.start()
+        server = telemetry.serve_metrics(poller, port=args.metrics_port)
+        print(f"📈 Serving metrics on http://{telemetry.METRICS_HOST}:{args.metrics_port}/metrics during the run")
+
+    try:
+        result = gtc.run_generation(
+            requirement, args.version, args.mode,
+            num_cases=args.num_cases, use_stream=not args.no_stream,
+            deadline_seconds=args.deadline, use_examples=args.examples,
+        )
+        filename_json, filename_md = gtc.save_results(result, args.output_dir)
+    except Exception as e:
+        print(f"❌ Error generating test cases: {e}")
+        return 1
+    finally:
+        if server:
+            server.shutdown()
+            poller.stop()
+
+    if result["partial"]:
+        print("⚠️ Deadline reached; saved partial results")
+    print(f"✅ Test cases + system stats saved to {filename_json}")
+    print(f"🗒️ Markdown version saved to {filename_md}")
+    print(f"⏱️ Response time: {result['response_time_seconds']} seconds")
+    return 0
+
+
+# ================== EXPORT ==================
+def _as_cell(value):
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value)
+    return "" if value is None else str(value)
+
+
+def export_xlsx(result, output_file):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "TestCases"
+    ws.append(EXCEL_HEADERS)
+    for idx, case in enumerate(result.get("structured_test_cases", []), start=1):
+        ws.append([
+            f"TC-{idx:03}",
+            result.get("requirement_id", ""),
+            _as_cell(case.get("test_case") or case.get("objective")),
+            _as_cell(case.get("preconditions")),
+            _as_cell(case.get("test_steps")),
+            _as_cell(case.get("test_data")),
+            _as_cell(case.get("expected_results")),
+            "", "", ""
+        ])
+    wb.save(output_file)
+
+
+def cmd_export(args):
+    import json
+
+    with open(args.result, "r", encoding="utf-8") as f:
+        result = json.load(f)
+
+    output_file = args.output or os.path.splitext(args.result)[0] + f".{args.format}"
+    if args.format == "xlsx":
+        export_xlsx(result, output_file)
+    else:
+        from generate_test_case import write_markdown
+        write_markdown(result, output_file)
+    print(f"✅ Exported {len(result.get('structured_test_cases', []))} test cases to {output_file}")
+    return 0
+
+
+# ================== PARSE ==================
+def cmd_parse(args):
+    import json
+    from generate_test_case import parse_outputs
+
+    with open(args.file, "r", encoding="utf-8") as f:
+        text = f.read()
+    print(json.dumps(parse_outputs([text]), indent=2, ensure_ascii=False))
+    return 0
+
+
+# ================== MONITOR / SERVE ==================
+def cmd_monitor(args):
+    import time
+    import telemetry
+
+    poller = telemetry.TelemetryPoller(interval=args.interval)
+    poller.start()
+    # System metrics only: generator metrics come from the process that generates
+    # (`serve`, or `generate --metrics-port`)
+    server = telemetry.serve_metrics(poller, args.host, args.port, generator=None)
+    print(f"📈 Serving metrics on http://{args.host}:{args.port}/metrics (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        poller.stop()
+    return 0
+
+
+def cmd_serve(args):
+    import service
+
+    server, manager, poller = service.serve(args.host, args.port, args.workers)
+    print(f"🚀 Generation service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if poller:
+            poller.stop()
+    return 0
+
+
+# ================== BENCH ==================
+IMPORT_BENCH_CASES = [
+    ("python -c pass", ["-c", "pass"]),
+    ("cli.py --help", [os.path.join(BASE_DIR, "cli.py"), "--help"]),
+    ("cli.py generate --help", [os.path.join(BASE_DIR, "cli.py"), "generate", "--help"]),
+    ("import generate_test_case", ["-c", "import generate_test_case"]),
+]
+
+
+def bench_imports(runs):
+    """
+    Time each startup path in a fresh interpreter; returns {label: median_ms}.
+    """
+    import statistics
+    import subprocess
+    import time
+
+    results = {}
+    for label, argv in IMPORT_BENCH_CASES:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + argv, cwd=BASE_DIR, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = statistics.median(timings)
+    return results
+
+
+def cmd_bench(args):
+    results = bench_imports(args.runs)
+    baseline = results["python -c pass"]
+    over_budget = False
+    print(f"⏱️ Startup time, median of {args.runs} runs (budget +{args.budget_ms} ms over bare python):")
+    for label, median_ms in results.items():
+        flag = ""
+        if median_ms - baseline > args.budget_ms:
+            flag = "  ❌ over budget"
+            over_budget = True
+        print(f"  {label:<28} {median_ms:7.1f} ms  (+{median_ms - baseline:5.1f} ms){flag}")
+    return 1 if over_budget else 0
+
+
+def cmd_bench_models(args):
+    import json
+    import generate_test_case as gtc
+
+    mock_server = None
+    if args.mock:
+        from mock_backend import start_mock_backend
+
+        profiles = None
+        if args.mock_profiles:
+            with open(args.mock_profiles, "r", encoding="utf-8") as f:
+                profiles = json.load(f)
+        mock_server, gtc.MODEL_API_URL = start_mock_backend(profiles, port=0)
+        print(f"🧪 Using mock backend at {gtc.MODEL_API_URL}")
+
+    import bench
+
+    try:
+        _, (filename_json, filename_md) = bench.run_benchmark(
+            args.models, args.requirements, args.versions, mode=args.mode,
+            num_cases=args.num_cases, repeats=args.repeats,
+            min_parse_rate=args.min_parse_rate, output_dir=args.output_dir,
+        )
+    finally:
+        if mock_server:
+            mock_server.shutdown()
+    print(f"✅ Benchmark report saved to {filename_json}")
+    print(f"🗒️ Markdown version saved to {filename_md}")
+    return 0
+
+
+# ================== PARSER ==================
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Manual test case generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="convert, split and normalize requirements, build training data and index")
+    p.add_argument("step", choices=["convert", "split", "normalize", "train", "index", "all"])
+    p.add_argument("--docx", default=DEFAULT_DOCX)
+    p.add_argument("--text", default=DEFAULT_TEXT)
+    p.add_argument("--req-dir", default=DEFAULT_REQ_DIR)
+    p.add_argument("--normalized-dir", default=DEFAULT_NORMALIZED_DIR)
+    p.add_argument("--train-file", default=DEFAULT_TRAIN_FILE)
+    p.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    p.add_argument("--deadline", type=float, help="seconds for the whole 'train' run")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("generate", help="generate test cases for a requirement JSON file")
+    p.add_argument("--requirement", default=DEFAULT_REQUIREMENT)
+    p.add_argument("--version", default="v2")
+    p.add_argument("--mode", choices=["batch", "parallel", "adaptive"], default="batch")
+    p.add_argument("--num-cases", type=int,
+                   help="variations (default 2); in adaptive mode the maximum (default 6)")
+    p.add_argument("--no-stream", action="store_true")
+    p.add_argument("--output-dir", default="outputs")
+    p.add_argument("--deadline", type=float, help="end-to-end budget in seconds; partial results are kept")
+    p.add_argument("--examples", action="store_true", help="add similar past test cases from the example index")
+    p.add_argument("--metrics-port", type=int, help="serve system and generator metrics on /metrics during the run")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("export", help="export a saved result JSON to Markdown or Excel")
+    p.add_argument("result")
+    p.add_argument("--format", choices=["md", "xlsx"], default="xlsx")
+    p.add_argument("--output")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("parse", help="parse raw model output into structured test cases")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_parse)
+
+    p = sub.add_parser("monitor", help="serve system metrics on /metrics")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=9108)
+    p.add_argument("--interval", type=float, default=2)
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser("serve", help="run the generation service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8088)
+    p.add_argument("--workers", type=int, default=2)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("bench", help="benchmarks")
+    bench_sub = p.add_subparsers(dest="bench", required=True)
+    b = bench_sub.add_parser("imports", help="measure CLI startup and import time")
+    b.add_argument("--runs", type=int, default=10)
+    b.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    b.set_defaults(func=cmd_bench)
+    b = bench_sub.add_parser("models", help="compare models/quantizations on the same requirements")
+    b.add_argument("--models", nargs="+", required=True)
+    b.add_argument("--requirements", nargs="+", default=[DEFAULT_REQUIREMENT])
+    b.add_argument("--versions", nargs="+", default=["v2"])
+    b.add_argument("--mode", choices=["batch", "parallel"], default="batch")
+    b.add_argument("--num-cases", type=int, default=2)
+    b.add_argument("--repeats", type=int, default=1)
+    b.add_argument("--min-parse-rate", type=float, default=0.8)
+    b.add_argument("--output-dir", default="outputs")
+    b.add_argument("--mock", action="store_true", help="run against a simulated backend")
+    b.add_argument("--mock-profiles", help="JSON file of {model: {ttft, tokens_per_second, json_valid_rate}}")
+    b.set_defaults(func=cmd_bench_models)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
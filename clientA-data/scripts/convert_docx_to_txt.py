@@ -1,5 +1,4 @@
 import os
-from docx import Document
 
 def convert_docx_to_txt(input_path, output_path=None):
     """
@@ -8,6 +7,8 @@ def convert_docx_to_txt(input_path, output_path=None):
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"❌ File not found: {input_path}")
 
+    from docx import Document  # python-docx is slow to import; only load it when converting
+
     doc = Document(input_path)
     text_content = [para.text for para in doc.paragraphs]
     full_text = "\n".join(text_content)
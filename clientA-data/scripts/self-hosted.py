@@ -1,20 +1,45 @@
 import os
-import requests
+import sys
 import json
-import time
 import re
-from openpyxl import Workbook, load_workbook
+
+# openpyxl and the repository's deadline module (which brings in requests) are imported inside the
+# functions that need them
 
 # =====================
 # CONFIG
 # =====================
-MODEL_ENDPOINT = "http://localhost:11434/api/generate"
-MODEL_NAME = "llama3.1:8b-instruct-q4_K_M"
+MODEL_ENDPOINT = os.environ.get("MODEL_API_URL", "http://localhost:11434/api/generate")
+MODEL_NAME = os.environ.get("MODEL_NAME", "llama3.1:8b-instruct-q4_K_M")
 MAX_RETRIES = 3
-TIMEOUT = 60  # seconds
+TIMEOUT = 60  # seconds; cap for a single read, the overall budget comes from the deadline
+
+
+def load_deadline_module():
+    """
+    deadline.py lives at the repository root; make it importable when this script is run directly.
+    """
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    import deadline
 
+    return deadline
+
+
+def ask_model(prompt: str, deadline=None, stats=None) -> str:
+    """
+    Stream a completion, retrying on errors within the remaining deadline budget.
+    The connection is shut down on expiry or cancel, also before the first byte arrives.
+    If the deadline hits mid-stream the partial text is returned and, if stats is a
+    dict, stats["partial"] is set to True.
+    """
+    dl = load_deadline_module()
+    deadline = deadline or dl.Deadline()
+    output_text = ""
+    if stats is not None:
+        stats["partial"] = False
 
-def ask_model(prompt: str) -> str:
     payload = {
         "model": MODEL_NAME,
         "prompt": prompt,
@@ -23,25 +48,33 @@ def ask_model(prompt: str) -> str:
     }
 
     for attempt in range(1, MAX_RETRIES + 1):
+        if deadline.expired:
+            break
         try:
             print(f"\n🚀 Sending prompt to model (attempt {attempt})...")
-            resp = requests.post(MODEL_ENDPOINT, json=payload, stream=True, timeout=TIMEOUT)
-            resp.raise_for_status()
-
             output_text = ""
-            for line in resp.iter_lines():
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line.decode("utf-8"))
-                    if "response" in obj:
-                        chunk = obj["response"]
-                        output_text += chunk
-                        print(f"[STREAM] {chunk}", end="", flush=True)
-                    if obj.get("done", False):
+            with deadline.session() as session, session.post(MODEL_ENDPOINT, json=payload, stream=True,
+                                                             timeout=deadline.timeout(TIMEOUT)) as resp:
+                resp.raise_for_status()
+
+                for line in resp.iter_lines():
+                    if deadline.expired:
                         break
-                except json.JSONDecodeError:
-                    continue
+                    if not line:
+                        continue
+                    try:
+                        obj = json.loads(line.decode("utf-8"))
+                        if "response" in obj:
+                            chunk = obj["response"]
+                            output_text += chunk
+                            print(f"[STREAM] {chunk}", end="", flush=True)
+                        if obj.get("done", False):
+                            break
+                    except json.JSONDecodeError:
+                        continue
+
+            if deadline.expired:
+                break
 
             print("\n\n==== Final Combined Output ====")
             print(output_text.strip())
@@ -50,14 +83,24 @@ def ask_model(prompt: str) -> str:
             return output_text.strip()
 
         except Exception as e:
+            if deadline.expired:
+                break
             print(f"⚠️ Attempt {attempt} failed: {e}")
             if attempt < MAX_RETRIES:
                 wait_time = 2 ** attempt
                 print(f"⏳ Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+                deadline.sleep(wait_time)
             else:
                 raise RuntimeError(f"❌ Model request failed after {MAX_RETRIES} attempts: {e}")
 
+    # Only reached when the deadline expired or the run was cancelled
+    if output_text.strip():
+        print(f"\n⏰ {deadline.reason or 'Deadline exceeded'}; returning partial output")
+        if stats is not None:
+            stats["partial"] = True
+        return output_text.strip()
+    raise dl.DeadlineExceeded(deadline.reason or "deadline exceeded")
+
 
 def parse_testcase(generated: str):
     """
@@ -92,7 +135,17 @@ def parse_testcase(generated: str):
     return fields
 
 
-def generate_manual_testcases(req_dir: str, output_file: str):
+def generate_manual_testcases(req_dir: str, output_file: str, deadline=None):
+    """
+    deadline (a deadline.Deadline) bounds the whole run; requirements not reached in
+    time are skipped and the workbook is saved with what was generated. Test cases cut
+    off by the deadline are not written: the workbook is the training set for the
+    few-shot example index and must only hold complete cases.
+    """
+    from openpyxl import Workbook, load_workbook
+
+    dl = load_deadline_module()
+
     wb = Workbook()
     ws = wb.active
     ws.title = "TestCases"
@@ -113,8 +166,14 @@ def generate_manual_testcases(req_dir: str, output_file: str):
         return
 
     tc_count = 1
+    own_deadline = deadline is None
+    deadline = deadline or dl.Deadline()
 
     for req_file in req_files:
+        if deadline.expired:
+            print(f"⏰ {deadline.reason or 'Deadline exceeded'}; skipping remaining requirements")
+            break
+
         with open(os.path.join(req_dir, req_file), "r", encoding="utf-8") as f:
             req_text = f.read()
 
@@ -130,7 +189,17 @@ Test Steps:
 Test Data:
 Expected Result:
 """
-        generated = ask_model(prompt)
+        stats = {}
+        try:
+            generated = ask_model(prompt, deadline, stats)
+        except dl.DeadlineExceeded:
+            continue
+        except KeyboardInterrupt:
+            deadline.cancel("interrupted")
+            continue
+        if stats["partial"]:
+            print(f"⚠️ Skipping {req_file}: output was cut off by the deadline")
+            continue
         fields = parse_testcase(generated)
 
         row_data = [
@@ -148,6 +217,8 @@ Expected Result:
         print(f"✅ Added Test Case {tc_count}: {row_data[:3]}")
         tc_count += 1
 
+    if own_deadline:
+        deadline.close()
     wb.save(output_file)
     print(f"\n📊 Total {tc_count-1} test cases written to {output_file}")
 
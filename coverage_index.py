@@ -0,0 +1,190 @@
+"""
+Requirement coverage index.
+
+Extracts every actionable element from a requirement JSON (each `action`, field
+label, button text and link) and matches generated test steps against it using
+precomputed normalized token sets, so coverage can be updated incrementally as
+each variation finishes.
+"""
+import re
+
+# Words that carry no meaning for matching a step to an element
+STOPWORDS = frozenset({
+    "a", "an", "the", "to", "in", "on", "of", "for", "with", "and", "or", "by", "at",
+    "is", "are", "be", "it", "this", "that", "your", "you", "user", "go", "step",
+    "page", "screen", "click", "tap", "press", "select", "enter", "button", "link",
+    "field", "verify", "check", "should", "then",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word):
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix) and not word.endswith("ss"):
+            return word[: -len(suffix)]
+    return word
+
+
+def normalize_tokens(text):
+    """
+    Lowercase, split on anything non-alphanumeric (so snake_case actions split too),
+    drop stopwords and strip common suffixes.
+    """
+    return frozenset(
+        _stem(token) for token in _TOKEN_RE.findall(str(text).lower()) if token not in STOPWORDS
+    )
+
+
+# ================== INDEX ==================
+def extract_elements(requirement):
+    """
+    Walk the requirement JSON and return (kind, text, path) for every actionable element.
+    """
+    elements = []
+
+    def walk(node, path):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                child = f"{path}.{key}" if path else key
+                if isinstance(value, str):
+                    if key == "action":
+                        elements.append(("action", value, child))
+                    elif key == "label":
+                        elements.append(("field", value, child))
+                    elif key == "text" and path.rsplit(".", 1)[-1] == "button":
+                        elements.append(("button", value, child))
+                    elif key.endswith("_link"):
+                        elements.append(("link", value, child))
+                else:
+                    walk(value, child)
+        elif isinstance(node, list):
+            for idx, value in enumerate(node):
+                walk(value, f"{path}[{idx}]")
+
+    walk(requirement, "")
+    return elements
+
+
+class CoverageIndex:
+    """
+    Deduplicated actionable elements with their token sets, plus an inverted index
+    from token to element so a step is only checked against elements sharing a token.
+    """
+
+    def __init__(self, requirement):
+        self.elements = []
+        self.tokens = []
+        self.postings = {}
+        seen = {}
+        for kind, text, path in extract_elements(requirement):
+            tokens = normalize_tokens(text)
+            if not tokens:
+                continue
+            key = (kind, tokens)
+            if key in seen:
+                self.elements[seen[key]]["paths"].append(path)
+                continue
+            element_id = len(self.elements)
+            seen[key] = element_id
+            self.elements.append({"kind": kind, "text": text, "paths": [path]})
+            self.tokens.append(tokens)
+            for token in tokens:
+                self.postings.setdefault(token, []).append(element_id)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def match(self, step_tokens, candidates=None):
+        """
+        Element ids whose tokens all appear in the step, limited to candidates if given.
+        """
+        matched = set()
+        for token in step_tokens:
+            for element_id in self.postings.get(token, ()):
+                if candidates is not None and element_id not in candidates:
+                    continue
+                if element_id not in matched and self.tokens[element_id] <= step_tokens:
+                    matched.add(element_id)
+        return matched
+
+
+# ================== TRACKER ==================
+def iter_cases(cases):
+    """
+    Flatten wrappers such as {"testCases": [...]} that JSON-mode outputs often use.
+    """
+    for case in cases:
+        if not isinstance(case, dict):
+            continue
+        if "test_steps" in case or "raw_output" in case:
+            yield case
+            continue
+        for value in case.values():
+            if isinstance(value, list):
+                yield from iter_cases(value)
+
+
+def case_steps(case):
+    """
+    Test steps of a structured case; raw (unparsed) outputs are treated line by line.
+    """
+    steps = case.get("test_steps")
+    if isinstance(steps, str):
+        return [steps]
+    if isinstance(steps, list):
+        return [str(step) for step in steps]
+    raw = case.get("raw_output")
+    if raw:
+        return raw.splitlines()
+    return []
+
+
+class CoverageTracker:
+    """
+    Incremental coverage: each update only checks elements that are still uncovered.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.uncovered = set(range(len(index)))
+        self.history = []
+
+    @property
+    def covered_count(self):
+        return len(self.index) - len(self.uncovered)
+
+    @property
+    def coverage(self):
+        return self.covered_count / len(self.index) if len(self.index) else 1.0
+
+    @property
+    def complete(self):
+        return not self.uncovered
+
+    def update(self, cases):
+        """
+        Record a finished variation's cases; returns the ids of newly covered elements.
+        """
+        newly_covered = set()
+        for case in iter_cases(cases):
+            for step in case_steps(case):
+                if not self.uncovered:
+                    break
+                hits = self.index.match(normalize_tokens(step), self.uncovered)
+                self.uncovered -= hits
+                newly_covered |= hits
+        self.history.append(round(self.coverage, 4))
+        return newly_covered
+
+    def report(self):
+        return {
+            "elements": len(self.index),
+            "covered": self.covered_count,
+            "coverage": round(self.coverage, 4),
+            "history": self.history,
+            "uncovered": [
+                {"kind": self.index.elements[i]["kind"], "text": self.index.elements[i]["text"]}
+                for i in sorted(self.uncovered)
+            ],
+        }
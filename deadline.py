@@ -0,0 +1,238 @@
+"""
+End-to-end deadlines and cancellation for model calls.
+
+A Deadline is created once per job and passed down into every request. Requests
+are sent through Deadline.session(), whose sockets register themselves as soon as
+they connect; when the deadline expires (or cancel() is called, e.g. on Ctrl-C)
+every registered socket is shut down. That unblocks the waiting thread even before
+the server has sent its headers, and drops the connection so Ollama aborts the
+generation server-side.
+"""
+import time
+import socket
+import weakref
+import threading
+from contextlib import contextmanager
+
+# Upper bound for a single connect when no deadline is set or plenty of time remains
+CONNECT_TIMEOUT = 10  # seconds
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def abort_response(response):
+    """
+    Shut down a streaming requests.Response from another thread. shutdown() (urllib3 2.3+)
+    wakes a reader blocked in recv(); close() alone does not on every platform.
+    """
+    raw = getattr(response, "raw", None)
+    shutdown = getattr(raw, "shutdown", None)
+    try:
+        if shutdown:
+            shutdown()
+    except Exception:
+        pass
+    try:
+        response.close()
+    except Exception:
+        pass
+
+
+def abort_socket(sock):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _watched_adapter(deadline):
+    """
+    A requests adapter whose connections register their socket with the deadline
+    right after connecting, i.e. before the request is even sent.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def watched(connection_cls):
+        class WatchedConnection(connection_cls):
+            def connect(self):
+                super().connect()
+                deadline._watch_socket(self.sock)
+
+            def close(self):
+                if self.sock is not None:
+                    deadline._unwatch_socket(self.sock)
+                super().close()
+
+        return WatchedConnection
+
+    class WatchedPool(HTTPConnectionPool):
+        ConnectionCls = watched(HTTPConnection)
+
+    class WatchedHTTPSPool(HTTPSConnectionPool):
+        ConnectionCls = watched(HTTPSConnection)
+
+    class WatchedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": WatchedPool, "https": WatchedHTTPSPool}
+
+    return WatchedAdapter()
+
+
+class Deadline:
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self.reason = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._responses = set()
+        self._sockets = set()
+        self._children = weakref.WeakSet()
+        self._timer = None
+        self._closed = False
+
+    def remaining(self):
+        """
+        Seconds left (never negative); None when there is no deadline.
+        """
+        if self._cancelled.is_set():
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self.expired:
+            raise DeadlineExceeded(self.reason or "deadline exceeded")
+
+    def timeout(self, cap=None):
+        """
+        (connect, read) timeout for requests: the remaining budget, capped by cap.
+        """
+        remaining = self.remaining()
+        read = cap if remaining is None else (remaining if cap is None else min(cap, remaining))
+        connect = CONNECT_TIMEOUT if read is None else min(CONNECT_TIMEOUT, read)
+        return (connect, read)
+
+    def sleep(self, seconds):
+        """
+        Sleep for up to seconds, returning early if the deadline expires or is cancelled.
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self._cancelled.wait(seconds)
+
+    def cancel(self, reason="cancelled"):
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+            self._cancelled.set()
+            responses = list(self._responses)
+            sockets = list(self._sockets)
+            children = list(self._children)
+            if self._timer:
+                self._timer.cancel()
+        for sock in sockets:
+            abort_socket(sock)
+        for response in responses:
+            abort_response(response)
+        for child in children:
+            child.cancel(reason)
+
+    def child(self):
+        """
+        A deadline with the same expiry that can be cancelled on its own (e.g. to stop
+        the remaining work of one step); cancelling this deadline cancels it too.
+        """
+        child = Deadline()
+        child.seconds = self.seconds
+        child.expires_at = self.expires_at
+        with self._lock:
+            self._children.add(child)
+            cancelled = self._cancelled.is_set()
+        if cancelled:
+            child.cancel(self.reason)
+        return child
+
+    def close(self):
+        """
+        Stop the expiry timer once the work this deadline guards has finished, so no
+        timer thread outlives the job (and later cancels it). Children are closed too.
+        """
+        with self._lock:
+            self._closed = True
+            timer, self._timer = self._timer, None
+            children = list(self._children)
+        if timer:
+            timer.cancel()
+        for child in children:
+            child.close()
+
+    def _arm_timer(self):
+        if self._timer is None and not self._closed and self.expires_at is not None:
+            self._timer = threading.Timer(self.remaining(), self.cancel, kwargs={"reason": "deadline exceeded"})
+            self._timer.daemon = True
+            self._timer.start()
+
+    @contextmanager
+    def watch(self, response):
+        """
+        Register a streaming response so expiry or cancel() shuts it down.
+        """
+        with self._lock:
+            self._responses.add(response)
+            self._arm_timer()
+            abort_now = self._cancelled.is_set()
+        if abort_now or self.expired:
+            abort_response(response)
+        try:
+            yield response
+        finally:
+            with self._lock:
+                self._responses.discard(response)
+
+    @contextmanager
+    def session(self):
+        """
+        A requests.Session for calls bounded by this deadline. Its sockets are shut
+        down on expiry or cancel() from the moment they connect, so a request still
+        waiting for headers (Ollama sends none while it loads the model or evaluates
+        the prompt) is aborted too, not just one that is already streaming.
+        """
+        import requests
+
+        session = requests.Session()
+        adapter = _watched_adapter(self)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def _watch_socket(self, sock):
+        with self._lock:
+            self._sockets.add(sock)
+            self._arm_timer()
+            abort_now = self._cancelled.is_set()
+        if abort_now or self.expired:
+            abort_socket(sock)
+
+    def _unwatch_socket(self, sock):
+        with self._lock:
+            self._sockets.discard(sock)
@@ -0,0 +1,263 @@
+"""
+Few-shot example index over clientA-data/train/Manual_TestCases.xlsx.
+
+Built offline: every past test case (with its requirement text) is turned into a
+hashed word uni/bigram TF-IDF vector and the matrix is saved as .npy files. At
+startup the arrays are memory-mapped, so retrieval is one matrix-vector product
+and only the selected examples are read from disk. Prompt size is bounded by a
+fixed token budget regardless of how large the training set grows.
+"""
+import os
+import re
+import json
+import math
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+# ================== CONFIG ==================
+TRAIN_FILE = "clientA-data/train/Manual_TestCases.xlsx"
+REQ_DIR = "clientA-data/text/normalized"
+INDEX_DIR = "clientA-data/index"
+N_FEATURES = 2 ** 12
+DEFAULT_TOP_K = 3
+DEFAULT_TOKEN_BUDGET = 600
+CHARS_PER_TOKEN = 4  # rough estimate; good enough for budgeting
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# ================== VECTORS ==================
+def _hashed_terms(text, n_features):
+    """
+    Word unigrams and bigrams hashed into n_features buckets with a sign bit
+    (crc32 is stable across processes, unlike hash()).
+    """
+    words = _WORD_RE.findall(str(text).lower())
+    terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    counts = {}
+    for term in terms:
+        h = zlib.crc32(term.encode("utf-8"))
+        bucket = h % n_features
+        sign = 1.0 if (h >> 31) & 1 == 0 else -1.0
+        counts[bucket] = counts.get(bucket, 0.0) + sign
+    return counts
+
+
+def _tf_vector(text, n_features):
+    vec = np.zeros(n_features, dtype=np.float32)
+    for bucket, count in _hashed_terms(text, n_features).items():
+        vec[bucket] = math.copysign(math.log1p(abs(count)), count)
+    return vec
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# ================== BUILD ==================
+def _cell(value):
+    return "" if value is None else str(value).strip()
+
+
+def load_examples(train_file=TRAIN_FILE, req_dir=REQ_DIR):
+    """
+    Read past test cases from the training workbook and attach their requirement text.
+    """
+    from openpyxl import load_workbook
+
+    ws = load_workbook(train_file, read_only=True).active
+    rows = ws.iter_rows(values_only=True)
+    headers = [_cell(h) for h in next(rows)]
+    examples = []
+    for row in rows:
+        record = dict(zip(headers, row))
+        if not _cell(record.get("Test Steps")):
+            continue
+        req_id = _cell(record.get("Requirement ID"))
+        req_path = os.path.join(req_dir, f"{req_id}.txt")
+        requirement = ""
+        if req_id and os.path.exists(req_path):
+            with open(req_path, "r", encoding="utf-8") as f:
+                requirement = f.read().strip()
+        examples.append({
+            "id": _cell(record.get("Test Case ID")),
+            "requirement_id": req_id,
+            "requirement": requirement,
+            "title": _cell(record.get("Title")),
+            "preconditions": _cell(record.get("Pre-Conditions")),
+            "test_steps": _cell(record.get("Test Steps")),
+            "test_data": _cell(record.get("Test Data")),
+            "expected_results": _cell(record.get("Expected Result")),
+        })
+    return examples
+
+
+def format_example(example):
+    """
+    The text inserted into the prompt for one example.
+    """
+    parts = [f"Example {example['id']}"]
+    if example["title"]:
+        parts.append(f"Title: {example['title']}")
+    for label, key in (("Preconditions", "preconditions"), ("Test Steps", "test_steps"),
+                       ("Test Data", "test_data"), ("Expected Results", "expected_results")):
+        if example[key]:
+            parts.append(f"{label}:\n{example[key]}")
+    return "\n".join(parts)
+
+
+def _save(index_dir, name, array):
+    with open(os.path.join(index_dir, name + ".tmp"), "wb") as f:
+        np.save(f, array)
+
+
+def build_index(train_file=TRAIN_FILE, req_dir=REQ_DIR, index_dir=INDEX_DIR, n_features=N_FEATURES):
+    """
+    Vectorize every example and write vectors.npy, idf.npy, offsets.npy, tokens.npy,
+    examples.jsonl and meta.json to index_dir. Returns the number of examples.
+    Files are written next to the old ones and renamed into place, meta.json last, so
+    a running process that has the old index memory-mapped is never left reading a
+    half-written file and can reload once meta.json changes.
+    """
+    examples = load_examples(train_file, req_dir)
+    os.makedirs(index_dir, exist_ok=True)
+
+    docs = [" ".join([e["requirement"], e["title"], e["test_steps"], e["expected_results"]]) for e in examples]
+
+    # Two passes so the full matrix is never held in memory: document frequencies
+    # first, then each weighted row is written straight into the memory-mapped file.
+    df = np.zeros(n_features, dtype=np.int64)
+    for doc in docs:
+        df[list(_hashed_terms(doc, n_features))] += 1
+    idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+    vectors = np.lib.format.open_memmap(
+        os.path.join(index_dir, "vectors.npy.tmp"), mode="w+", dtype=np.float32, shape=(len(docs), n_features)
+    )
+    for row, doc in enumerate(docs):
+        vectors[row] = _normalize(_tf_vector(doc, n_features) * idf)
+    vectors.flush()
+    del vectors
+
+    offsets = np.zeros(len(examples), dtype=np.int64)
+    tokens = np.zeros(len(examples), dtype=np.int32)
+    with open(os.path.join(index_dir, "examples.jsonl.tmp"), "wb") as f:
+        for row, example in enumerate(examples):
+            text = format_example(example)
+            offsets[row] = f.tell()
+            tokens[row] = estimate_tokens(text)
+            record = {"id": example["id"], "requirement_id": example["requirement_id"], "text": text}
+            f.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    _save(index_dir, "idf.npy", idf)
+    _save(index_dir, "offsets.npy", offsets)
+    _save(index_dir, "tokens.npy", tokens)
+    with open(os.path.join(index_dir, "meta.json.tmp"), "w", encoding="utf-8") as f:
+        json.dump({
+            "built_at": datetime.now().isoformat(),
+            "train_file": train_file,
+            "count": len(examples),
+            "n_features": n_features,
+        }, f, indent=2)
+    for name in ("vectors.npy", "idf.npy", "offsets.npy", "tokens.npy", "examples.jsonl", "meta.json"):
+        os.replace(os.path.join(index_dir, name + ".tmp"), os.path.join(index_dir, name))
+    return len(examples)
+
+
+# ================== QUERY ==================
+def requirement_text(requirement):
+    """
+    Flatten a requirement (JSON dict/list or plain text) into the words used for retrieval.
+    """
+    if isinstance(requirement, str):
+        return requirement
+    values = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+        elif isinstance(node, str):
+            values.append(node.replace("_", " "))
+
+    walk(requirement)
+    return " ".join(values)
+
+
+class ExampleIndex:
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.n_features = self.meta["n_features"]
+        mmap_mode = "r" if self.meta["count"] else None  # numpy cannot mmap empty arrays
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode=mmap_mode)
+        self.idf = np.load(os.path.join(index_dir, "idf.npy"))
+        self.offsets = np.load(os.path.join(index_dir, "offsets.npy"), mmap_mode=mmap_mode)
+        self.tokens = np.load(os.path.join(index_dir, "tokens.npy"), mmap_mode=mmap_mode)
+        self.examples_path = os.path.join(index_dir, "examples.jsonl")
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def search(self, query, k=DEFAULT_TOP_K):
+        """
+        Top-k (row, score) pairs by cosine similarity, best first.
+        """
+        if len(self) == 0 or k <= 0:
+            return []
+        q = _normalize(_tf_vector(requirement_text(query), self.n_features) * self.idf)
+        scores = self.vectors @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top if scores[row] > 0]
+
+    def _read(self, rows):
+        records = []
+        with open(self.examples_path, "rb") as f:
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                records.append(json.loads(f.readline()))
+        return records
+
+    def select(self, query, k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        The most similar examples, at most k of them and at most token_budget tokens in total.
+        A few extra candidates are considered so one long example does not crowd out the rest.
+        """
+        chosen = []
+        used = 0
+        for row, score in self.search(query, k * 3):
+            cost = int(self.tokens[row])
+            if used + cost > token_budget:
+                continue
+            chosen.append(row)
+            used += cost
+            if len(chosen) == k:
+                break
+        return self._read(chosen)
+
+
+def format_examples_block(examples):
+    if not examples:
+        return ""
+    body = "\n\n".join(example["text"] for example in examples)
+    return ("Reference test cases written for similar requirements "
+            "(match their level of detail, do not copy them):\n\n" + body)
+
+
+# ================== MAIN ==================
+if __name__ == "__main__":
+    count = build_index()
+    print(f"✅ Indexed {count} examples into {INDEX_DIR}")
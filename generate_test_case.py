@@ -1,43 +1,75 @@
-import psutil
 import time
 import json
-import requests
 import os
 import logging
-import json
 import re
 from datetime import datetime
 from threading import Thread, Event
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from deadline import Deadline, DeadlineExceeded
+from telemetry import GENERATOR_METRICS
+
+# psutil, requests and pynvml are imported where they are used so that importing
+# this module (e.g. for the parser) stays fast and has no side effects.
 
 # ================== CONFIG ==================
 PROMPTS_FILE = "prompts/prompts.json"
 OUTPUT_DIR = "outputs"
-MODEL_API_URL = "http://localhost:11434/api/generate"
-MODEL_NAME = "llama3.1:8b-instruct-q4_K_M"
+MODEL_API_URL = os.environ.get("MODEL_API_URL", "http://localhost:11434/api/generate")
+MODEL_NAME = os.environ.get("MODEL_NAME", "llama3.1:8b-instruct-q4_K_M")
 CPU_LOG_FILE = "cpu_usage.log"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Cap for a single read; the end-to-end budget comes from the job's Deadline
+REQUEST_TIMEOUT = 600  # seconds
+# How long a cancelled variation gets to hand back its partial text
+CANCEL_GRACE_SECONDS = 2
 
 # Enable/disable streaming globally
 USE_STREAM = True  
 
+# Variations per request; in adaptive mode this is the maximum, since it stops early
+NUM_CASES = 2
+ADAPTIVE_MAX_CASES = 6
+
+# Few-shot examples retrieved from the prebuilt index (see example_index.py)
+USE_EXAMPLES = False
+EXAMPLE_INDEX_DIR = "clientA-data/index"
+EXAMPLES_TOP_K = 3
+EXAMPLES_TOKEN_BUDGET = 600
+
+
 # ================== LOGGER SETUP ==================
-logging.basicConfig(
-    filename=CPU_LOG_FILE,
-    level=logging.INFO,
-    format="%(asctime)s - %(message)s"
-)
+def setup_logging():
+    logging.basicConfig(
+        filename=CPU_LOG_FILE,
+        level=logging.INFO,
+        format="%(asctime)s - %(message)s"
+    )
+
 
 # ================== SYSTEM MONITOR ==================
-try:
-    import pynvml
-    pynvml.nvmlInit()
-    gpu_available = True
-except Exception:
-    gpu_available = False
+_nvml_state = {"initialized": False, "available": False}
+
+
+def gpu_available():
+    """
+    Initialize NVML on first use; returns whether GPU stats can be collected.
+    """
+    if not _nvml_state["initialized"]:
+        _nvml_state["initialized"] = True
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            _nvml_state["available"] = True
+        except Exception:
+            _nvml_state["available"] = False
+    return _nvml_state["available"]
 
 
 def get_cpu_info():
+    import psutil
+
     percent = psutil.cpu_percent(interval=0.5)
     per_core = psutil.cpu_percent(interval=0.5, percpu=True)
     logging.info(f"CPU Overall: {percent}%")
@@ -47,6 +79,8 @@ def get_cpu_info():
 
 
 def get_memory_info():
+    import psutil
+
     mem = psutil.virtual_memory()
     return {
         "total": round(mem.total / (1024 ** 3), 2),
@@ -57,8 +91,10 @@ def get_memory_info():
 
 
 def get_gpu_info():
-    if not gpu_available:
+    if not gpu_available():
         return None
+    import pynvml
+
     gpu_info_list = []
     device_count = pynvml.nvmlDeviceGetCount()
     for i in range(device_count):
@@ -89,29 +125,105 @@ def monitor_system(stop_event, stats_list):
 
 
 # ================== STREAM HANDLER ==================
-def call_model_streaming(payload):
+def _record_stats(stats, start, first_chunk_at, chunk_count, final):
+    """
+    Fill a per-request stats dict. Ollama's own eval_count/eval_duration are used
+    when present, otherwise tokens are approximated by streamed chunks.
+    """
+    if stats is None:
+        return
+    end = time.perf_counter()
+    eval_count = final.get("eval_count", chunk_count)
+    eval_seconds = final.get("eval_duration", 0) / 1e9
+    if not eval_seconds:
+        eval_seconds = end - (first_chunk_at or start)
+    stats.update({
+        "ttft_seconds": round((first_chunk_at or end) - start, 4),
+        "elapsed_seconds": round(end - start, 4),
+        "eval_count": eval_count,
+        "tokens_per_second": round(eval_count / eval_seconds, 2) if eval_seconds > 0 else 0.0,
+    })
+
+
+def call_model_streaming(payload, on_chunk=None, echo=True, stats=None, deadline=None):
     """
     Calls Ollama with stream=True and prints chunks live to console,
     while also collecting the full response string.
+    If on_chunk is given it is called with every chunk as it arrives.
+    If stats is a dict it is filled with TTFT, token count and tokens/sec.
+    When the deadline expires or is cancelled the connection is shut down, also while
+    still waiting for the first byte (Ollama then stops generating), and the text
+    received so far is returned.
     """
+    deadline = deadline or Deadline()
+    deadline.check()
     response_text = ""
-    with requests.post(MODEL_API_URL, json=payload, stream=True, timeout=600) as r:
-        r.raise_for_status()
-        for line in r.iter_lines():
-            if not line:
-                continue
-            try:
-                data = json.loads(line.decode("utf-8"))
-                chunk = data.get("response", "")
-                if chunk:
-                    print(chunk, end="", flush=True)  # live stream to console
-                    response_text += chunk
-            except json.JSONDecodeError:
-                continue
-    print("\n")  # final newline after stream
+    GENERATOR_METRICS.request_started()
+    failed = True
+    start = time.perf_counter()
+    first_chunk_at = None
+    chunk_count = 0
+    final = {}
+    try:
+        with deadline.session() as session, session.post(MODEL_API_URL, json=payload, stream=True,
+                                                         timeout=deadline.timeout(REQUEST_TIMEOUT)) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if deadline.expired:
+                    break
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line.decode("utf-8"))
+                    if data.get("done"):
+                        final = data
+                    chunk = data.get("response", "")
+                    if chunk:
+                        if first_chunk_at is None:
+                            first_chunk_at = time.perf_counter()
+                        chunk_count += 1
+                        if echo:
+                            print(chunk, end="", flush=True)  # live stream to console
+                        if on_chunk:
+                            on_chunk(chunk)
+                        response_text += chunk
+                        GENERATOR_METRICS.record_tokens(1)  # Ollama streams one token per chunk
+                except json.JSONDecodeError:
+                    continue
+        failed = False
+    except Exception:
+        if not deadline.expired:
+            raise
+        failed = False  # aborted by the deadline; keep the partial text
+    finally:
+        GENERATOR_METRICS.request_finished(failed=failed)
+    _record_stats(stats, start, first_chunk_at, chunk_count, final)
+    if stats is not None:
+        stats["partial"] = deadline.expired
+    if echo:
+        print("\n")  # final newline after stream
     return response_text
 
 
+def call_model_blocking(payload, stats=None, deadline=None):
+    """
+    Returns the full response string without echoing it.
+    The request is still streamed internally: with stream=False Ollama sends nothing
+    until generation ends, so there would be no open response to shut down on
+    cancel and the server would keep generating. Partial text is returned on expiry.
+    """
+    return call_model_streaming({**payload, "stream": True}, echo=False, stats=stats, deadline=deadline).strip()
+
+
+def call_model(payload, use_stream=USE_STREAM, on_chunk=None, echo=True, stats=None, deadline=None):
+    if use_stream:
+        return call_model_streaming(payload, on_chunk=on_chunk, echo=echo, stats=stats, deadline=deadline)
+    text = call_model_blocking(payload, stats=stats, deadline=deadline)
+    if on_chunk and text:
+        on_chunk(text)
+    return text
+
+
 # ================== TEXT PARSER ==================
 def extract_structured_test_case(text: str):
     split_pattern = r"(?=\*\*?Test Case(?:\s+\d+|:))"
@@ -154,6 +266,23 @@ def extract_structured_test_case(text: str):
     return cases
 
 
+def parse_outputs(all_outputs):
+    """
+    Parse raw model outputs into structured test cases, falling back to the
+    markdown parser and finally to the raw text.
+    """
+    structured_all_cases = []
+    for output_text in all_outputs:
+        try:
+            structured_cases = json.loads(output_text)
+            if isinstance(structured_cases, dict):
+                structured_cases = [structured_cases]
+        except json.JSONDecodeError:
+            structured_cases = extract_structured_test_case(output_text)
+        structured_all_cases.extend(structured_cases or [{"raw_output": output_text}])
+    return structured_all_cases
+
+
 # ================== PROMPT LOADER ==================
 def load_prompt(version):
     with open(PROMPTS_FILE, "r", encoding="utf-8") as f:
@@ -164,51 +293,316 @@ def load_prompt(version):
     raise ValueError(f"Version {version} not found in {PROMPTS_FILE}")
 
 
+_example_index_cache = {}  # index dir -> (meta.json mtime, ExampleIndex)
+_example_index_missing = set()
+
+
+def few_shot_block(requirement):
+    """
+    Most similar past test cases, capped at EXAMPLES_TOKEN_BUDGET tokens.
+    The index is memory-mapped once per process and reloaded when it is rebuilt
+    (meta.json changes); returns "" while it has not been built.
+    """
+    from example_index import ExampleIndex, format_examples_block
+
+    try:
+        mtime = os.stat(os.path.join(EXAMPLE_INDEX_DIR, "meta.json")).st_mtime_ns
+        cached = _example_index_cache.get(EXAMPLE_INDEX_DIR)
+        if cached is None or cached[0] != mtime:
+            cached = _example_index_cache[EXAMPLE_INDEX_DIR] = (mtime, ExampleIndex(EXAMPLE_INDEX_DIR))
+    except FileNotFoundError:
+        if EXAMPLE_INDEX_DIR not in _example_index_missing:
+            _example_index_missing.add(EXAMPLE_INDEX_DIR)
+            logging.warning(f"Example index not found in {EXAMPLE_INDEX_DIR}; run 'cli.py ingest index'")
+        return ""
+    _example_index_missing.discard(EXAMPLE_INDEX_DIR)
+    return format_examples_block(cached[1].select(requirement, EXAMPLES_TOP_K, EXAMPLES_TOKEN_BUDGET))
+
+
+def build_prompt(prompt_data, requirement, use_examples=USE_EXAMPLES):
+    requirement_str = json.dumps(requirement, indent=2)  # ✅ serialize dict to string
+    template = prompt_data["template"].replace("{requirement}", requirement_str)
+    if use_examples:
+        examples = few_shot_block(requirement)
+        if examples:
+            template += f"\n\n{examples}"
+    return template
+
+
+def default_num_cases(mode):
+    return ADAPTIVE_MAX_CASES if mode == "adaptive" else NUM_CASES
+
+
 # ================== PARALLEL MODE ==================
-def generate_multiple_test_cases(requirement, version, num_cases=2, use_stream=USE_STREAM):
+def generate_multiple_test_cases(requirement, version, num_cases=NUM_CASES, use_stream=USE_STREAM,
+                                 on_chunk=None, echo=True, model=None, stats=None, deadline=None,
+                                 use_examples=USE_EXAMPLES):
+    """
+    Generates num_cases variations in parallel.
+    on_chunk, if given, is called as on_chunk(case_idx, chunk).
+    If stats is a list, one stats dict per model request is appended to it.
+    When the deadline hits, running variations are cancelled and return what they have
+    so far; variations that never started come back as "".
+    """
+    deadline = deadline or Deadline()
     prompt_data = load_prompt(version)
+    run_variation = _variation_runner(requirement, prompt_data, use_stream, on_chunk, echo, model, stats, deadline,
+                                      use_examples)
 
-    def call_model(case_idx):
-        requirement_str = json.dumps(requirement, indent=2)  # ✅ serialize dict to string
-        template = prompt_data["template"].replace("{requirement}", requirement_str)
-        template += f"\n\n⚡ Generate unique variation #{case_idx+1} of the test cases."
-        payload = {"model": MODEL_NAME, "prompt": template, "stream": use_stream}
+    executor = ThreadPoolExecutor(max_workers=min(num_cases, os.cpu_count()))
+    futures = [executor.submit(run_variation, case_idx) for case_idx in range(num_cases)]
+    try:
+        _, not_done = wait(futures, timeout=deadline.remaining())
+        if not_done:
+            deadline.cancel("deadline exceeded")
+    except KeyboardInterrupt:
+        deadline.cancel("interrupted")  # close the streams so the server stops generating
+        raise
+    finally:
+        # After a cancel the aborted streams finish on their own; don't block on them
+        executor.shutdown(wait=not deadline.cancelled, cancel_futures=True)
 
-        if use_stream:
-            return call_model_streaming(payload)
-        else:
-            response = requests.post(MODEL_API_URL, json=payload, timeout=600)
-            response.raise_for_status()
-            return response.json().get("response", "").strip()
+    grace = CANCEL_GRACE_SECONDS if deadline.cancelled else None
+    return [_result_or_partial(future, grace) for future in futures]
 
-    with ThreadPoolExecutor(max_workers=min(num_cases, os.cpu_count())) as executor:
-        outputs = list(executor.map(call_model, range(num_cases)))
 
+def _result_or_partial(future, timeout=None):
+    """
+    A variation's text; "" if it never started, was refused by the deadline, or did
+    not return its partial text within timeout.
+    """
+    if future.cancelled():
+        return ""
+    try:
+        return future.result(timeout)
+    except (DeadlineExceeded, FutureTimeout):
+        return ""
+
+
+def _variation_runner(requirement, prompt_data, use_stream, on_chunk, echo, model, stats, deadline,
+                      use_examples=USE_EXAMPLES):
+    base_prompt = build_prompt(prompt_data, requirement, use_examples)
+
+    def run_variation(case_idx):
+        template = base_prompt + f"\n\n⚡ Generate unique variation #{case_idx+1} of the test cases."
+        payload = {"model": model or MODEL_NAME, "prompt": template, "stream": use_stream}
+        chunk_cb = (lambda chunk: on_chunk(case_idx, chunk)) if on_chunk else None
+        request_stats = {} if stats is not None else None
+        text = call_model(payload, use_stream=use_stream, on_chunk=chunk_cb, echo=echo, stats=request_stats,
+                          deadline=deadline)
+        if stats is not None:
+            stats.append(request_stats)
+        return text
+
+    return run_variation
+
+
+# ================== ADAPTIVE MODE ==================
+def generate_until_covered(requirement, version, max_cases=ADAPTIVE_MAX_CASES, workers=2, patience=1,
+                           use_stream=USE_STREAM, on_chunk=None, echo=True, model=None, stats=None, coverage=None,
+                           deadline=None, use_examples=USE_EXAMPLES):
+    """
+    Like parallel mode, but keeps requesting variations only while they add coverage of the
+    requirement's actionable elements (actions, field labels, button texts, links).
+    The first variation runs alone; after that up to `workers` run at once. At least one
+    variation is always generated. Stops when every element is covered (variations still
+    running are cancelled and dropped), when `patience` variations in a row add nothing,
+    or after max_cases variations. Outputs are returned in completion order.
+    If coverage is a dict it is filled with the coverage report.
+    When the deadline hits, in-flight variations are cancelled and their partial text kept.
+    """
+    from coverage_index import CoverageIndex, CoverageTracker
+
+    deadline = deadline or Deadline()
+    # Cancelled on full coverage without cancelling the caller's deadline
+    variations = deadline.child()
+    prompt_data = load_prompt(version)
+    run_variation = _variation_runner(requirement, prompt_data, use_stream, on_chunk, echo, model, stats, variations,
+                                      use_examples)
+    tracker = CoverageTracker(CoverageIndex(requirement))
+    outputs = []
+    stale = 0
+    submitted = 0
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, max_cases)))
+    pending = set()
+    try:
+        while True:
+            stop = (submitted and (tracker.complete or stale >= patience)) or variations.expired
+            limit = workers if outputs else 1
+            while not stop and submitted < max_cases and len(pending) < limit:
+                pending.add(executor.submit(run_variation, submitted))
+                submitted += 1
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=variations.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                # Out of time: keep whatever the cancelled variations return
+                deadline.cancel("deadline exceeded")
+                for future in pending:
+                    text = _result_or_partial(future, CANCEL_GRACE_SECONDS)
+                    outputs.append(text)
+                    tracker.update(parse_outputs([text]))
+                break
+            for future in done:
+                text = _result_or_partial(future)
+                outputs.append(text)
+                if tracker.update(parse_outputs([text])):
+                    stale = 0
+                else:
+                    stale += 1
+            if tracker.complete and pending:
+                variations.cancel("coverage complete")
+                for future in pending:
+                    future.cancel()
+                pending = set()
+    except KeyboardInterrupt:
+        deadline.cancel("interrupted")
+        raise
+    finally:
+        executor.shutdown(wait=not variations.cancelled, cancel_futures=True)
+        variations.close()
+
+    if coverage is not None:
+        coverage.update(tracker.report())
+        coverage["variations"] = len(outputs)
     return outputs
 
 
 # ================== BATCH MODE ==================
-def generate_batched_test_cases(requirement, version, use_stream=USE_STREAM):
+def generate_batched_test_cases(requirement, version, use_stream=USE_STREAM, on_chunk=None, echo=True,
+                                model=None, stats=None, deadline=None, use_examples=USE_EXAMPLES):
+    """
+    Generates all test cases in a single JSON-mode request.
+    on_chunk, if given, is called as on_chunk(0, chunk).
+    If stats is a list, the request's stats dict is appended to it.
+    """
     prompt_data = load_prompt(version)
     
-    requirement_str = json.dumps(requirement, indent=2)  # ✅ serialize dict to string
-    template = prompt_data["template"].replace("{requirement}", requirement_str)
+    template = build_prompt(prompt_data, requirement, use_examples)
     template += f"\n\n⚡ Generate unique test cases in JSON array format. " \
                 f"Each item should include: test_case, objective, preconditions, test_data, test_steps, expected_results."
 
     payload = {
-        "model": MODEL_NAME,
+        "model": model or MODEL_NAME,
         "prompt": template,
         "format": "json",
         "stream": use_stream
     }
+    chunk_cb = (lambda chunk: on_chunk(0, chunk)) if on_chunk else None
+    request_stats = {} if stats is not None else None
+    text = call_model(payload, use_stream=use_stream, on_chunk=chunk_cb, echo=echo, stats=request_stats,
+                      deadline=deadline)
+    if stats is not None:
+        stats.append(request_stats)
+    return text
+
+
+# ================== RESULTS ==================
+def write_markdown(result, filename_md):
+    with open(filename_md, "w", encoding="utf-8") as f:
+        f.write("# 🧪 Generated Test Cases\n\n")
+        f.write(f"**Requirement:** {json.dumps(result['requirement'], indent=2)}\n\n")  # ✅ better formatting
+        f.write(f"**Version:** {result['version']}\n\n")
+        f.write(f"**Mode:** {result['mode']}\n\n")
+        f.write(f"**Response Time (s):** {result['response_time_seconds']}\n\n")
+        f.write("---\n\n")
+        for idx, case in enumerate(result["structured_test_cases"], start=1):
+            f.write(f"## Test Case {idx}\n\n")
+            for key, value in case.items():
+                section_title = key.replace("_", " ").title()
+                f.write(f"### {section_title}\n")
+                if isinstance(value, list):
+                    for item in value:
+                        f.write(f"- {item}\n")
+                else:
+                    f.write(f"{value}\n")
+                f.write("\n")
+            f.write("---\n\n")
 
-    if use_stream:
-        return call_model_streaming(payload)
-    else:
-        response = requests.post(MODEL_API_URL, json=payload, timeout=600)
-        response.raise_for_status()
-        return response.json().get("response", "").strip()
+
+def save_results(result, output_dir=OUTPUT_DIR):
+    """
+    Save a generation result as JSON and Markdown; returns both paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename_json = os.path.join(
+        output_dir, f"testcase_{result['version']}_{result['mode']}_{timestamp_str}.json"
+    )
+    with open(filename_json, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    filename_md = filename_json.replace(".json", ".md")
+    write_markdown(result, filename_md)
+    return filename_json, filename_md
+
+
+def run_generation(requirement, version, mode="batch", num_cases=None, use_stream=USE_STREAM, deadline_seconds=None,
+                   use_examples=USE_EXAMPLES):
+    """
+    Generate test cases while sampling system stats in the background.
+    Returns the result dict that save_results() writes to disk.
+    num_cases defaults to NUM_CASES (ADAPTIVE_MAX_CASES in adaptive mode).
+    deadline_seconds bounds the whole run; whatever was generated by then is returned.
+    On Ctrl-C every open stream is closed before the interrupt propagates.
+    """
+    setup_logging()
+
+    coverage = None
+    deadline = Deadline(deadline_seconds)
+    num_cases = num_cases or default_num_cases(mode)
+
+    # ====== Start system monitoring in background ======
+    stop_event = Event()
+    stats_list = []
+    monitor_thread = Thread(target=monitor_system, args=(stop_event, stats_list))
+    monitor_thread.start()
+
+    try:
+        start_time = time.time()  # ✅ start timer
+
+        if mode == "parallel":
+            print("📝 Generating multiple test cases in PARALLEL...\n")
+            all_outputs = generate_multiple_test_cases(requirement, version, num_cases=num_cases, use_stream=use_stream,
+                                                       deadline=deadline, use_examples=use_examples)
+        elif mode == "adaptive":
+            print("📝 Generating test case variations until coverage stops rising...\n")
+            coverage = {}
+            all_outputs = generate_until_covered(requirement, version, max_cases=num_cases, use_stream=use_stream,
+                                                 coverage=coverage, deadline=deadline, use_examples=use_examples)
+            print(f"🎯 Coverage {coverage['coverage']:.0%} of {coverage['elements']} elements "
+                  f"after {coverage['variations']} variations")
+        else:
+            print("📝 Generating multiple test cases in BATCH mode...\n")
+            all_outputs = [generate_batched_test_cases(requirement, version, use_stream=use_stream,
+                                                       deadline=deadline, use_examples=use_examples)]
+
+        end_time = time.time()  # ✅ end timer
+        response_time_seconds = round(end_time - start_time, 2)
+    except KeyboardInterrupt:
+        deadline.cancel("interrupted")
+        raise
+    finally:
+        deadline.close()
+        # ====== Stop monitoring after generation ======
+        stop_event.set()
+        monitor_thread.join()
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "version": version,
+        "mode": mode,
+        "requirement": requirement,
+        "response_time_seconds": response_time_seconds,
+        "deadline_seconds": deadline_seconds,
+        "partial": deadline.expired,
+        "use_examples": use_examples,
+        "generated_output": all_outputs,
+        "structured_test_cases": parse_outputs(all_outputs),
+        "system_stats": stats_list,
+        **({"coverage": coverage} if coverage is not None else {})
+    }
 
 
 # ================== MAIN ==================
@@ -309,86 +703,17 @@ if __name__ == "__main__":
     }
 
     version = "v2"
-    mode = "batch"   # change to "parallel" or "batch"
-
-    # ====== Start system monitoring in background ======
-    stop_event = Event()
-    stats_list = []
-    monitor_thread = Thread(target=monitor_system, args=(stop_event, stats_list))
-    monitor_thread.start()
+    mode = "batch"   # change to "parallel", "adaptive" or "batch"
 
     try:
-        start_time = time.time()  # ✅ start timer
-
-        if mode == "parallel":
-            print("📝 Generating multiple test cases in PARALLEL...\n")
-            all_outputs = generate_multiple_test_cases(requirement, version, num_cases=2, use_stream=USE_STREAM)
-        else:
-            print("📝 Generating multiple test cases in BATCH mode...\n")
-            all_outputs = [generate_batched_test_cases(requirement, version, use_stream=USE_STREAM)]
-
-        end_time = time.time()  # ✅ end timer
-        response_time_seconds = round(end_time - start_time, 2)
-
-        # Parse outputs
-        structured_all_cases = []
-        for output_text in all_outputs:
-            try:
-                structured_cases = json.loads(output_text)
-                if isinstance(structured_cases, dict):
-                    structured_cases = [structured_cases]
-            except json.JSONDecodeError:
-                structured_cases = extract_structured_test_case(output_text)
-            structured_all_cases.extend(structured_cases or [{"raw_output": output_text}])
-
-        # ====== Stop monitoring after generation ======
-        stop_event.set()
-        monitor_thread.join()
-
-        # Save JSON with system stats included
-        timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename_json = os.path.join(
-            OUTPUT_DIR, f"testcase_{version}_{mode}_{timestamp_str}.json"
-        )
-        with open(filename_json, "w", encoding="utf-8") as f:
-            json.dump({
-                "timestamp": datetime.now().isoformat(),
-                "version": version,
-                "mode": mode,
-                "requirement": requirement,
-                "response_time_seconds": response_time_seconds,
-                "generated_output": all_outputs,
-                "structured_test_cases": structured_all_cases,
-                "system_stats": stats_list
-            }, f, indent=2, ensure_ascii=False)
-
-        # Save Markdown
-        filename_md = filename_json.replace(".json", ".md")
-        with open(filename_md, "w", encoding="utf-8") as f:
-            f.write("# 🧪 Generated Test Cases\n\n")
-            f.write(f"**Requirement:** {json.dumps(requirement, indent=2)}\n\n")  # ✅ better formatting
-            f.write(f"**Version:** {version}\n\n")
-            f.write(f"**Mode:** {mode}\n\n")
-            f.write(f"**Response Time (s):** {response_time_seconds}\n\n")
-            f.write("---\n\n")
-            for idx, case in enumerate(structured_all_cases, start=1):
-                f.write(f"## Test Case {idx}\n\n")
-                for key, value in case.items():
-                    section_title = key.replace("_", " ").title()
-                    f.write(f"### {section_title}\n")
-                    if isinstance(value, list):
-                        for item in value:
-                            f.write(f"- {item}\n")
-                    else:
-                        f.write(f"{value}\n")
-                    f.write("\n")
-                f.write("---\n\n")
+        result = run_generation(requirement, version, mode, use_stream=USE_STREAM)
+        if result["partial"]:
+            print("⚠️ Deadline reached; saving partial results")
+        filename_json, filename_md = save_results(result)
 
         print(f"✅ Test cases + system stats saved to {filename_json}")
         print(f"🗒️ Markdown version saved to {filename_md}")
-        print(f"⏱️ Response time: {response_time_seconds} seconds")
+        print(f"⏱️ Response time: {result['response_time_seconds']} seconds")
 
     except Exception as e:
-        stop_event.set()
-        monitor_thread.join()
         print(f"❌ Error generating test cases: {e}")
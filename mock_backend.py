@@ -0,0 +1,156 @@
+"""
+Mock Ollama /api/generate backend for benchmarking without a real model.
+
+Each model name gets a speed profile (time to first token, tokens/sec and how
+often it returns valid JSON) so the benchmark can be exercised end-to-end.
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ================== CONFIG ==================
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 11500
+
+
+# ================== PROFILES ==================
+def default_profile(model):
+    """
+    Rough simulation from the model tag: bigger models and wider quants are slower
+    but produce valid JSON more often. e.g. "llama3.1:8b-instruct-q4_K_M".
+    """
+    size = re.search(r"(\d+(?:\.\d+)?)b", model.lower())
+    quant = re.search(r"q(\d+)", model.lower())
+    params_b = float(size.group(1)) if size else 8.0
+    bits = int(quant.group(1)) if quant else 16
+    return {
+        "ttft": round(0.02 * params_b, 3),
+        "tokens_per_second": round(1920 / (params_b * bits), 1),
+        "json_valid_rate": min(1.0, 0.55 + 0.05 * params_b + 0.02 * bits),
+    }
+
+
+def sample_test_cases(rng, count):
+    providers = ["Apple", "Facebook", "Google"]
+    cases = []
+    for idx in range(1, count + 1):
+        provider = rng.choice(providers)
+        cases.append({
+            "test_case": f"TC-{idx:03} Sign in with {provider}",
+            "objective": f"Verify that the user can sign in with {provider}",
+            "preconditions": ["User is on the Sign in to Scoreboard page"],
+            "test_data": [f"Valid {provider} account"],
+            "test_steps": [f"Click 'Sign in with {provider}'", "Complete the provider login"],
+            "expected_results": ["User is signed in and redirected to the dashboard"],
+        })
+    return cases
+
+
+def tokenize(text):
+    return re.findall(r"\s*\S+", text)
+
+
+# ================== SERVER ==================
+def make_handler(profiles):
+    class MockOllamaHandler(BaseHTTPRequestHandler):
+        # Ollama streams with chunked transfer encoding, one chunk per token
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            model = payload.get("model", "")
+            profile = profiles.get(model) or default_profile(model)
+            if payload.get("keep_alive") == 0 and not payload.get("prompt"):
+                # Unload request, answered without generating like Ollama does
+                self._send_body({"model": model, "response": "", "done": True, "done_reason": "unload"})
+                return
+
+            seed = hashlib.sha256((model + payload.get("prompt", "")).encode("utf-8")).hexdigest()
+            rng = random.Random(seed)
+            text = json.dumps(sample_test_cases(rng, rng.randint(2, 5)))
+            if rng.random() > profile["json_valid_rate"]:
+                text = text[: len(text) // 2]  # truncated output fails to parse
+            tokens = tokenize(text)
+            delay = 1.0 / profile["tokens_per_second"]
+
+            start = time.perf_counter()
+            time.sleep(profile["ttft"])
+            eval_start = time.perf_counter()
+            if payload.get("stream", True):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        self._write({"model": model, "response": token, "done": False})
+                        time.sleep(delay)
+                    self._write(self._final(model, "", tokens, start, eval_start))
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client cancelled; stop generating like Ollama does
+            else:
+                time.sleep(delay * len(tokens))
+                self._send_body(self._final(model, text, tokens, start, eval_start))
+
+        def _send_body(self, obj):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write(self, obj):
+            data = (json.dumps(obj) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        @staticmethod
+        def _final(model, response, tokens, start, eval_start):
+            now = time.perf_counter()
+            return {
+                "model": model,
+                "response": response,
+                "done": True,
+                "total_duration": int((now - start) * 1e9),
+                "eval_count": len(tokens),
+                "eval_duration": int((now - eval_start) * 1e9),
+            }
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockOllamaHandler
+
+
+def start_mock_backend(profiles=None, host=MOCK_HOST, port=MOCK_PORT):
+    """
+    Start the mock backend in a background thread; returns (server, api_url).
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(profiles or {}))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/api/generate"
+
+
+# ================== MAIN ==================
+if __name__ == "__main__":
+    server, api_url = start_mock_backend()
+    print(f"🧪 Mock model backend on {api_url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,480 @@
+import json
+import time
+import uuid
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from deadline import Deadline, DeadlineExceeded
+from generate_test_case import (
+    USE_EXAMPLES,
+    USE_STREAM,
+    default_num_cases,
+    generate_batched_test_cases,
+    generate_multiple_test_cases,
+    generate_until_covered,
+    load_prompt,
+    parse_outputs,
+)
+from telemetry import GENERATOR_METRICS, TelemetryPoller, render_metrics
+
+# ================== CONFIG ==================
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8088
+NUM_WORKERS = 2
+STREAM_POLL_SECONDS = 15  # keep-alive interval for idle /stream connections
+MODES = ("batch", "parallel", "adaptive")
+# End-to-end budget per job, counted from submission (queue time included)
+DEFAULT_DEADLINE_SECONDS = 600
+FINISHED = ("done", "failed", "cancelled", "expired")
+# Finished jobs stay queryable for this long, and at most this many are kept
+FINISHED_JOB_TTL_SECONDS = 3600
+MAX_FINISHED_JOBS = 500
+
+
+# ================== JOBS ==================
+_MISSING = object()
+
+
+def request_field(body, name, types, default=_MISSING, nullable=False):
+    """
+    body[name] if it has one of the given types; bools are not accepted as numbers
+    and strings like "false" are not accepted as bools.
+    """
+    if name not in body:
+        if default is _MISSING:
+            raise ValueError(f"missing field {name!r}")
+        return default
+    value = body[name]
+    if value is None and nullable:
+        return None
+    if isinstance(value, types) and not (isinstance(value, bool) and bool not in types):
+        return value
+    expected = " or ".join(t.__name__ for t in types) + (" or null" if nullable else "")
+    raise ValueError(f"field {name!r} must be {expected}, got {type(value).__name__}")
+
+
+def job_key(requirement, version, mode, num_cases, use_examples=USE_EXAMPLES):
+    """
+    Identity used for single-flight coalescing: same requirement, version and mode.
+    """
+    canonical = json.dumps(
+        {"requirement": requirement, "version": version, "mode": mode, "num_cases": num_cases,
+         "use_examples": use_examples},
+        sort_keys=True,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Job:
+    def __init__(self, key, requirement, version, mode, num_cases, use_stream,
+                 deadline_seconds=DEFAULT_DEADLINE_SECONDS, use_examples=USE_EXAMPLES):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.requirement = requirement
+        self.version = version
+        self.mode = mode
+        self.num_cases = num_cases
+        self.use_stream = use_stream
+        self.use_examples = use_examples
+        self.deadline = Deadline(deadline_seconds)
+        self.partial = False
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.response_time_seconds = None
+        self.outputs = None
+        self.structured_test_cases = None
+        self.coverage = None
+        self.error = None
+        self.subscribers = 1
+        # Streamed events are only needed while the job runs or someone is streaming it;
+        # once both are over they are dropped (the result still holds every output).
+        self.events = []
+        self._streamers = 0
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    def _status_event(self):
+        event = {"event": "status", "status": self.status}
+        if self.done:
+            event["error"] = self.error
+        return event
+
+    def publish(self, event):
+        with self._cond:
+            if self.events is not None:
+                self.events.append(event)
+            self._cond.notify_all()
+
+    def set_status(self, status, error=None):
+        """
+        Change status and publish it atomically, so a subscriber that sees the job
+        as finished has also received its final status event.
+        """
+        with self._cond:
+            self.status = status
+            if status == "running":
+                self.started_at = datetime.now().isoformat()
+            elif status in FINISHED:
+                self.error = error
+                self.finished_at = datetime.now().isoformat()
+            self.events.append(self._status_event())
+            if self.done and not self._streamers:
+                self.events = None
+            self._cond.notify_all()
+
+    @contextmanager
+    def subscription(self):
+        with self._cond:
+            self._streamers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._streamers -= 1
+                if self.done and not self._streamers:
+                    self.events = None
+
+    def wait_events(self, start, timeout):
+        """
+        Return (events after index start, done), blocking up to timeout if there are
+        none yet. Both are read under the same lock.
+        """
+        with self._cond:
+            if self.events is None:
+                # Finished and dropped before this subscriber arrived
+                return ([self._status_event()] if start == 0 else []), True
+            if len(self.events) <= start and not self.done:
+                self._cond.wait(timeout)
+            return self.events[start:], self.done
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "version": self.version,
+            "mode": self.mode,
+            "num_cases": self.num_cases,
+            "subscribers": self.subscribers,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "response_time_seconds": self.response_time_seconds,
+            "deadline_seconds": self.deadline.seconds,
+            "partial": self.partial,
+            "error": self.error,
+        }
+
+    def result(self):
+        return {
+            **self.summary(),
+            "requirement": self.requirement,
+            "generated_output": self.outputs,
+            "structured_test_cases": self.structured_test_cases,
+            "coverage": self.coverage,
+        }
+
+
+class JobManager:
+    """
+    Job queue with worker threads. Identical requests that are still queued or
+    running share one job (and therefore one model call); the first request's
+    deadline applies to everyone sharing it, and it is only cancelled once every
+    request sharing it has been cancelled.
+    """
+
+    def __init__(self, num_workers=NUM_WORKERS, finished_ttl=FINISHED_JOB_TTL_SECONDS,
+                 max_finished=MAX_FINISHED_JOBS):
+        self.queue = queue.Queue()
+        self.jobs = {}
+        self.in_flight = {}
+        self.finished = OrderedDict()  # job id -> monotonic finish time, oldest first
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self.lock = threading.Lock()
+        self.workers = [
+            threading.Thread(target=self._worker, daemon=True) for _ in range(num_workers)
+        ]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, requirement, version, mode="batch", num_cases=None, use_stream=USE_STREAM,
+               deadline_seconds=DEFAULT_DEADLINE_SECONDS, use_examples=USE_EXAMPLES):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        if num_cases is None:
+            num_cases = default_num_cases(mode)
+        if num_cases < 1:
+            raise ValueError(f"num_cases must be at least 1, got {num_cases}")
+        if deadline_seconds is not None and deadline_seconds <= 0:
+            raise ValueError(f"deadline_seconds must be positive, got {deadline_seconds}")
+        load_prompt(version)  # unknown versions are rejected here, not in the worker
+        if mode == "batch":
+            num_cases = 1
+        key = job_key(requirement, version, mode, num_cases, use_examples)
+        with self.lock:
+            job = self.in_flight.get(key)
+            if job is not None:
+                job.subscribers += 1
+                return job, True
+            job = Job(key, requirement, version, mode, num_cases, use_stream, deadline_seconds, use_examples)
+            self.jobs[job.id] = job
+            self.in_flight[key] = job
+            self.queue.put(job)
+            GENERATOR_METRICS.set_queue_depth(self.queue.qsize())
+        return job, False
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Drop one subscriber of a queued or running job; returns (job, cancelled).
+        Only when the last subscriber leaves is the job cancelled: open streams are
+        closed, which also stops the generation on the server, and whatever was
+        produced so far is kept. Coalesced requests share a job id, so each DELETE
+        counts for one of them.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None, False
+            if job.done or job.subscribers == 0:
+                return job, False
+            job.subscribers -= 1
+            if job.subscribers:
+                return job, False
+            if self.in_flight.get(job.key) is job:
+                del self.in_flight[job.key]
+        job.deadline.cancel("cancelled")
+        return job, True
+
+    def _finish(self, job, status, error=None):
+        with self.lock:
+            # Later identical requests start a fresh generation
+            if self.in_flight.get(job.key) is job:
+                del self.in_flight[job.key]
+        job.deadline.close()
+        job.set_status(status, error)
+        with self.lock:
+            self.finished[job.id] = time.monotonic()
+            self._evict_finished()
+
+    def _evict_finished(self):
+        """
+        Forget finished jobs older than finished_ttl, and the oldest beyond max_finished.
+        Called with self.lock held.
+        """
+        cutoff = time.monotonic() - self.finished_ttl
+        while self.finished:
+            job_id, finished_at = next(iter(self.finished.items()))
+            if finished_at > cutoff and len(self.finished) <= self.max_finished:
+                break
+            del self.finished[job_id]
+            self.jobs.pop(job_id, None)
+
+    def _run(self, job):
+        def on_chunk(case_idx, chunk):
+            job.publish({"event": "chunk", "variation": case_idx, "text": chunk})
+
+        if job.mode == "adaptive":
+            job.coverage = {}
+            return generate_until_covered(
+                job.requirement, job.version, max_cases=job.num_cases,
+                use_stream=job.use_stream, on_chunk=on_chunk, echo=False, coverage=job.coverage,
+                deadline=job.deadline, use_examples=job.use_examples,
+            )
+        if job.mode == "parallel":
+            return generate_multiple_test_cases(
+                job.requirement, job.version, num_cases=job.num_cases,
+                use_stream=job.use_stream, on_chunk=on_chunk, echo=False, deadline=job.deadline,
+                use_examples=job.use_examples,
+            )
+        return [generate_batched_test_cases(
+            job.requirement, job.version, use_stream=job.use_stream, on_chunk=on_chunk, echo=False,
+            deadline=job.deadline, use_examples=job.use_examples,
+        )]
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            GENERATOR_METRICS.set_queue_depth(self.queue.qsize())
+            if job.deadline.expired:
+                # Cancelled or out of budget while still queued; never reaches the model
+                self._finish(job, "cancelled" if job.deadline.reason == "cancelled" else "expired",
+                             job.deadline.reason or "deadline exceeded")
+                self.queue.task_done()
+                continue
+            job.set_status("running")
+            start_time = time.time()
+            status, error = "done", None
+            try:
+                job.outputs = self._run(job)
+                job.structured_test_cases = parse_outputs(job.outputs)
+                job.partial = job.deadline.expired
+                # Same terminal statuses as a job that never left the queue
+                if job.deadline.reason == "cancelled":
+                    status = "cancelled"
+                elif job.partial:
+                    status, error = "expired", job.deadline.reason or "deadline exceeded"
+            except DeadlineExceeded as e:
+                status, error = "expired", str(e)
+            except Exception as e:
+                status, error = "failed", str(e)
+            finally:
+                job.response_time_seconds = round(time.time() - start_time, 2)
+                self._finish(job, status, error)
+                self.queue.task_done()
+
+
+# ================== HTTP API ==================
+def make_handler(manager, poller=None):
+    class ServiceHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _job_or_404(self, job_id):
+            job = manager.get(job_id)
+            if job is None:
+                self._send_json(404, {"error": f"Unknown job {job_id}"})
+            return job
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("body must be a JSON object")
+                job, coalesced = manager.submit(
+                    request_field(body, "requirement", (dict,)),
+                    request_field(body, "version", (str,), "v2"),
+                    mode=request_field(body, "mode", (str,), "batch"),
+                    num_cases=request_field(body, "num_cases", (int,), None, nullable=True),
+                    use_stream=request_field(body, "use_stream", (bool,), USE_STREAM),
+                    deadline_seconds=request_field(body, "deadline_seconds", (int, float), DEFAULT_DEADLINE_SECONDS,
+                                                   nullable=True),
+                    use_examples=request_field(body, "use_examples", (bool,), USE_EXAMPLES),
+                )
+            except ValueError as e:
+                self._send_json(400, {"error": f"Invalid request: {e}"})
+                return
+            self._send_json(202, {**job.summary(), "coalesced": coalesced})
+
+        def do_GET(self):
+            parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+            if parts == ["metrics"]:
+                sample = poller.latest() if poller else {}
+                data = render_metrics(sample).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = self._job_or_404(parts[1])
+                if job:
+                    self._send_json(200, job.summary())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+                job = self._job_or_404(parts[1])
+                if job is None:
+                    return
+                if job.status in ("done", "cancelled", "expired"):
+                    self._send_json(200, job.result())
+                elif job.status == "failed":
+                    self._send_json(500, job.result())
+                else:
+                    self._send_json(202, job.summary())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "stream":
+                job = self._job_or_404(parts[1])
+                if job:
+                    self._stream(job)
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_DELETE(self):
+            parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+            if len(parts) != 2 or parts[0] != "jobs":
+                self._send_json(404, {"error": "Not found"})
+                return
+            job, cancelled = manager.cancel(parts[1])
+            if job is None:
+                self._send_json(404, {"error": f"Unknown job {parts[1]}"})
+                return
+            self._send_json(202, {**job.summary(), "cancelled": cancelled})
+
+        def _stream(self, job):
+            """
+            Stream job events as newline-delimited JSON until the job finishes.
+            Late subscribers of a running job get every chunk produced so far first;
+            for a finished job only the final status and result are sent.
+            """
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            sent = 0
+            try:
+                with job.subscription():
+                    while True:
+                        events, done = job.wait_events(sent, STREAM_POLL_SECONDS)
+                        for event in events:
+                            self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+                        sent += len(events)
+                        self.wfile.flush()
+                        if done:
+                            break
+                self.wfile.write((json.dumps({"event": "result", **job.result()}, ensure_ascii=False) + "\n").encode("utf-8"))
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # subscriber went away; the job keeps running for the others
+
+        def log_message(self, format, *args):
+            pass
+
+    return ServiceHandler
+
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, num_workers=NUM_WORKERS, poll_system=True):
+    manager = JobManager(num_workers)
+    manager.start()
+    poller = None
+    if poll_system:
+        poller = TelemetryPoller()
+        poller.start()
+    server = ThreadingHTTPServer((host, port), make_handler(manager, poller))
+    server.daemon_threads = True
+    return server, manager, poller
+
+
+# ================== MAIN ==================
+if __name__ == "__main__":
+    server, manager, poller = serve()
+    print(f"🚀 Generation service listening on http://{SERVICE_HOST}:{SERVICE_PORT}")
+    print("   POST /jobs · GET|DELETE /jobs/<id> · GET /jobs/<id>/result · GET /jobs/<id>/stream · GET /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if poller:
+            poller.stop()
@@ -0,0 +1,345 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# psutil, requests and http.server are imported where they are used: the generator
+# imports this module only for GENERATOR_METRICS and must stay cheap to import.
+
+# ================== CONFIG ==================
+GLANCES_API = "http://localhost:61208/api/4"
+CPU_TOTAL_API = f"{GLANCES_API}/cpu"
+CPU_CORE_API = f"{GLANCES_API}/percpu"
+GPU_API = f"{GLANCES_API}/gpu"
+TIMEOUT = 10
+POLL_INTERVAL = 2
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+METRIC_PREFIX = "testgen"
+
+# Window used to compute the live tokens/sec rate
+TOKEN_RATE_WINDOW = 10  # seconds
+
+
+# ================== GENERATOR METRICS ==================
+class GeneratorMetrics:
+    """
+    Thread-safe counters updated by the generator while requests are running.
+    """
+
+    def __init__(self, window=TOKEN_RATE_WINDOW):
+        self._lock = threading.Lock()
+        self._window = window
+        self._token_events = deque()
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.requests_total = 0
+        self.requests_failed = 0
+        self.tokens_total = 0
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.requests_total += 1
+
+    def request_finished(self, failed=False):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if failed:
+                self.requests_failed += 1
+
+    def record_tokens(self, count=1):
+        now = time.monotonic()
+        with self._lock:
+            self.tokens_total += count
+            self._token_events.append((now, count))
+            self._trim(now)
+
+    def set_queue_depth(self, depth):
+        with self._lock:
+            self.queue_depth = depth
+
+    def _trim(self, now):
+        while self._token_events and now - self._token_events[0][0] > self._window:
+            self._token_events.popleft()
+
+    def tokens_per_second(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            return sum(count for _, count in self._token_events) / self._window
+
+    def snapshot(self):
+        rate = self.tokens_per_second()
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "requests_total": self.requests_total,
+                "requests_failed": self.requests_failed,
+                "tokens_total": self.tokens_total,
+                "tokens_per_second": round(rate, 2),
+            }
+
+
+# Shared instance; the generator and the /metrics endpoint both use this one
+GENERATOR_METRICS = GeneratorMetrics()
+
+
+# ================== GLANCES POLLER ==================
+def make_session(pool_size=4):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def parse_cpu_total(data):
+    if not isinstance(data, dict):
+        return {}
+    return {
+        "total": float(data.get("total", 0.0)),
+        "user": float(data.get("user", 0.0)),
+        "system": float(data.get("system", 0.0)),
+        "idle": float(data.get("idle", 0.0)),
+        "cores": data.get("cpucore"),
+    }
+
+
+def parse_cpu_cores(data):
+    """
+    The Glances percpu plugin returns one dict per core with a "total" key; plain
+    percentages are accepted too.
+    """
+    if not isinstance(data, list):
+        return []
+    cores = []
+    for item in data:
+        if isinstance(item, dict):
+            cores.append(float(item.get("total", 0.0)))
+        elif isinstance(item, (int, float)):
+            cores.append(float(item))
+    return cores
+
+
+def parse_gpus(data):
+    if not isinstance(data, list):
+        return []
+    return [
+        {
+            "id": str(gpu.get("gpu_id", idx)),
+            "name": gpu.get("name", ""),
+            "utilization_gpu": float(gpu.get("gpu_util", gpu.get("proc")) or 0.0),
+            "utilization_mem": float(gpu.get("mem_util", gpu.get("mem")) or 0.0),
+        }
+        for idx, gpu in enumerate(data)
+        if isinstance(gpu, dict)
+    ]
+
+
+def get_local_stats():
+    import psutil
+
+    mem = psutil.virtual_memory()
+    return {
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "per_core_percent": psutil.cpu_percent(interval=None, percpu=True),
+        "memory_total": mem.total,
+        "memory_used": mem.used,
+        "memory_percent": mem.percent,
+    }
+
+
+class TelemetryPoller(threading.Thread):
+    """
+    Polls the Glances CPU, per-core and GPU endpoints concurrently over one pooled
+    session and merges them with local psutil data. The latest sample is kept in memory.
+    """
+
+    ENDPOINTS = {
+        "cpu": (CPU_TOTAL_API, parse_cpu_total),
+        "cores": (CPU_CORE_API, parse_cpu_cores),
+        "gpu": (GPU_API, parse_gpus),
+    }
+
+    def __init__(self, interval=POLL_INTERVAL, timeout=TIMEOUT):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.timeout = timeout
+        self.stop_event = threading.Event()
+        self.session = make_session(len(self.ENDPOINTS))
+        self.executor = ThreadPoolExecutor(max_workers=len(self.ENDPOINTS))
+        self._lock = threading.Lock()
+        self._latest = {}
+
+    def _fetch(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def poll_once(self):
+        futures = {
+            name: self.executor.submit(self._fetch, url)
+            for name, (url, _) in self.ENDPOINTS.items()
+        }
+        sample = {"timestamp": time.time(), "local": get_local_stats(), "errors": {}}
+        for name, future in futures.items():
+            parser = self.ENDPOINTS[name][1]
+            try:
+                sample[name] = parser(future.result())
+            except Exception as e:
+                sample[name] = parser(None)
+                sample["errors"][name] = str(e)
+        with self._lock:
+            self._latest = sample
+        return sample
+
+    def latest(self):
+        with self._lock:
+            return dict(self._latest)
+
+    def run(self):
+        import psutil
+
+        # Prime psutil so the first non-blocking cpu_percent call is meaningful
+        psutil.cpu_percent(interval=None, percpu=True)
+        while not self.stop_event.is_set():
+            self.poll_once()
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+# ================== PROMETHEUS EXPOSITION ==================
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric(lines, name, help_text, metric_type, samples):
+    full_name = f"{METRIC_PREFIX}_{name}"
+    lines.append(f"# HELP {full_name} {help_text}")
+    lines.append(f"# TYPE {full_name} {metric_type}")
+    for labels, value in samples:
+        if labels:
+            label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+            lines.append(f"{full_name}{{{label_str}}} {value}")
+        else:
+            lines.append(f"{full_name} {value}")
+
+
+def render_metrics(sample, generator=GENERATOR_METRICS):
+    """
+    Render the latest telemetry sample and generator counters in Prometheus text format.
+    generator=None leaves the generator metrics out (a standalone monitor never generates).
+    """
+    lines = []
+    local = sample.get("local") or {}
+    cpu = sample.get("cpu") or {}
+
+    cpu_samples = []
+    if cpu:
+        for mode in ("total", "user", "system", "idle"):
+            cpu_samples.append(({"source": "glances", "mode": mode}, cpu[mode]))
+    if local:
+        cpu_samples.append(({"source": "psutil", "mode": "total"}, local["cpu_percent"]))
+    _metric(lines, "cpu_percent", "CPU usage percent.", "gauge", cpu_samples)
+
+    core_samples = [
+        ({"source": "glances", "core": idx}, usage)
+        for idx, usage in enumerate(sample.get("cores") or [])
+    ]
+    core_samples += [
+        ({"source": "psutil", "core": idx}, usage)
+        for idx, usage in enumerate(local.get("per_core_percent") or [])
+    ]
+    _metric(lines, "cpu_core_percent", "Per-core CPU usage percent.", "gauge", core_samples)
+
+    if local:
+        _metric(lines, "memory_used_bytes", "Used system memory in bytes.", "gauge",
+                [({}, local["memory_used"])])
+        _metric(lines, "memory_total_bytes", "Total system memory in bytes.", "gauge",
+                [({}, local["memory_total"])])
+
+    gpus = sample.get("gpu") or []
+    _metric(lines, "gpu_utilization_percent", "GPU utilization percent.", "gauge",
+            [({"gpu": g["id"], "name": g["name"]}, g["utilization_gpu"]) for g in gpus])
+    _metric(lines, "gpu_memory_utilization_percent", "GPU memory utilization percent.", "gauge",
+            [({"gpu": g["id"], "name": g["name"]}, g["utilization_mem"]) for g in gpus])
+
+    _metric(lines, "glances_up", "Whether each Glances endpoint answered the last poll.", "gauge",
+            [({"endpoint": name}, 0 if name in sample.get("errors", {}) else 1)
+             for name in TelemetryPoller.ENDPOINTS if sample])
+
+    if generator is None:
+        return "\n".join(lines) + "\n"
+    stats = generator.snapshot()
+    _metric(lines, "requests_in_flight", "Model requests currently running.", "gauge",
+            [({}, stats["in_flight"])])
+    _metric(lines, "queue_depth", "Generation jobs waiting to run.", "gauge",
+            [({}, stats["queue_depth"])])
+    _metric(lines, "tokens_per_second", f"Generated tokens per second over the last {TOKEN_RATE_WINDOW}s.",
+            "gauge", [({}, stats["tokens_per_second"])])
+    _metric(lines, "tokens_total", "Generated tokens since start.", "counter",
+            [({}, stats["tokens_total"])])
+    _metric(lines, "requests_total", "Model requests started since start.", "counter",
+            [({}, stats["requests_total"])])
+    _metric(lines, "requests_failed_total", "Model requests that failed since start.", "counter",
+            [({}, stats["requests_failed"])])
+    return "\n".join(lines) + "\n"
+
+
+# ================== HTTP ENDPOINT ==================
+def make_metrics_handler(poller, generator=GENERATOR_METRICS):
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_metrics(poller.latest(), generator).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def serve_metrics(poller, host=METRICS_HOST, port=METRICS_PORT, generator=GENERATOR_METRICS):
+    """
+    Start the /metrics HTTP endpoint in a background thread and return the server.
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), make_metrics_handler(poller, generator))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ================== MAIN ==================
+if __name__ == "__main__":
+    poller = TelemetryPoller()
+    poller.start()
+    server = serve_metrics(poller, generator=None)
+    print(f"📈 Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        poller.stop()
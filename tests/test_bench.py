@@ -0,0 +1,44 @@
+import json
+import os
+
+import bench
+import generate_test_case as gtc
+from mock_backend import start_mock_backend
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROFILES = {
+    "fast-invalid": {"ttft": 0.01, "tokens_per_second": 3000, "json_valid_rate": 0.0},
+    "slow-valid": {"ttft": 0.05, "tokens_per_second": 400, "json_valid_rate": 1.0},
+}
+
+
+def test_benchmark_against_mock_backend(monkeypatch, tmp_path):
+    monkeypatch.chdir(ROOT)  # prompts/prompts.json is read relative to the repository
+    server, api_url = start_mock_backend(PROFILES, port=0)
+    monkeypatch.setattr(gtc, "MODEL_API_URL", api_url)
+    requirement_file = tmp_path / "requirement.json"
+    requirement_file.write_text(json.dumps({"feature": "Sign in with Apple"}), encoding="utf-8")
+
+    try:
+        report, (filename_json, filename_md) = bench.run_benchmark(
+            list(PROFILES), [str(requirement_file)], ["v2"], repeats=2, output_dir=str(tmp_path),
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    fast, slow = (next(r for r in report["results"] if r["model"] == name) for name in PROFILES)
+    assert fast["tokens_per_second"] > slow["tokens_per_second"]
+    assert (fast["parse_rate"], slow["parse_rate"]) == (0.0, 1.0)
+
+    # The faster model is ranked last because it falls below the parse-rate floor
+    assert [r["model"] for r in report["results"]] == ["slow-valid", "fast-invalid"]
+    assert (slow["rank"], slow["meets_parse_rate"]) == (1, True)
+    assert (fast["rank"], fast["meets_parse_rate"]) == (2, False)
+    assert slow["test_cases"] > 0 and slow["errors"] == 0
+
+    with open(filename_json, "r", encoding="utf-8") as f:
+        assert json.load(f)["results"][0]["model"] == "slow-valid"
+    with open(filename_md, "r", encoding="utf-8") as f:
+        assert "| 1 | slow-valid |" in f.read()
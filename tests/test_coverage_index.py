@@ -0,0 +1,55 @@
+from coverage_index import CoverageIndex, CoverageTracker, extract_elements, normalize_tokens
+
+REQUIREMENT = {
+    "steps": [
+        {
+            "options": {"social_login": [{"provider": "Apple", "action": "sign_in_with_apple"}]},
+            "field": {"label": "Email address"},
+            "button": {"text": "Continue", "action": "go_to_password_step"},
+            "footer": {"help_link": "Help"},
+        }
+    ]
+}
+
+
+def test_extract_elements_finds_every_kind():
+    kinds = sorted(kind for kind, _, _ in extract_elements(REQUIREMENT))
+    assert kinds == ["action", "action", "button", "field", "link"]
+
+
+def test_normalize_tokens_splits_snake_case_and_keeps_double_s():
+    assert normalize_tokens("sign_in_with_apple") == {"sign", "apple"}
+    assert normalize_tokens("Email address") == {"email", "address"}
+
+
+def test_empty_requirement_is_trivially_complete():
+    tracker = CoverageTracker(CoverageIndex({"feature": "Sign in"}))
+    assert len(tracker.index) == 0
+    assert tracker.complete
+    assert tracker.coverage == 1.0
+    assert tracker.update([{"test_steps": ["anything"]}]) == set()
+
+
+def test_partial_coverage_is_incremental():
+    tracker = CoverageTracker(CoverageIndex(REQUIREMENT))
+    total = len(tracker.index)
+
+    first = tracker.update([{"test_steps": ["Click 'Sign in with Apple'", "Enter the email address"]}])
+    assert len(first) == 2
+    assert not tracker.complete
+    assert tracker.covered_count == 2
+
+    # Already covered elements are not reported again
+    assert tracker.update([{"test_steps": ["Sign in with Apple"]}]) == set()
+
+    tracker.update([{"testCases": [{"test_steps": ["Tap Continue", "Go to password step", "Open Help"]}]}])
+    assert tracker.complete
+    assert tracker.history == [round(2 / total, 4), round(2 / total, 4), 1.0]
+    assert tracker.report()["uncovered"] == []
+
+
+def test_raw_output_is_matched_line_by_line():
+    tracker = CoverageTracker(CoverageIndex(REQUIREMENT))
+    tracker.update([{"raw_output": "1. Open the page\n2. Click Help"}])
+    assert tracker.covered_count == 1
+    assert {"kind": "link", "text": "Help"} not in tracker.report()["uncovered"]
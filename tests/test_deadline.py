@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+
+
+class FakeResponse:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_no_deadline_never_expires():
+    deadline = Deadline()
+    assert deadline.remaining() is None
+    assert not deadline.expired
+    assert deadline.timeout(30) == (10, 30)
+    deadline.check()
+
+
+def test_expiry():
+    deadline = Deadline(0.05)
+    assert deadline.timeout(30)[1] <= 0.05
+    time.sleep(0.1)
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+
+
+def test_cancel_aborts_watched_responses_and_children():
+    deadline = Deadline(60)
+    child = deadline.child()
+    response = FakeResponse()
+    with deadline.watch(response):
+        deadline.cancel("cancelled")
+    assert response.closed
+    assert deadline.expired and deadline.reason == "cancelled"
+    assert child.cancelled and child.reason == "cancelled"
+
+
+def test_child_cancel_leaves_parent_running():
+    deadline = Deadline(60)
+    deadline.child().cancel("coverage complete")
+    assert not deadline.cancelled
+
+
+def test_timer_cancels_watched_response_on_expiry():
+    deadline = Deadline(0.05)
+    response = FakeResponse()
+    with deadline.watch(response):
+        time.sleep(0.2)
+        assert response.closed
+    assert deadline.reason == "deadline exceeded"
+
+
+def test_close_stops_the_timer():
+    deadline = Deadline(0.1)
+    child = deadline.child()
+    with deadline.watch(FakeResponse()), child.watch(FakeResponse()):
+        pass
+    timers = [deadline._timer, child._timer]
+    assert all(timer.is_alive() for timer in timers)
+
+    deadline.close()
+    for timer in timers:
+        timer.join(1)
+        assert not timer.is_alive()
+    time.sleep(0.15)
+    assert deadline.reason is None and not deadline.cancelled
+
+    # A closed deadline does not start a new timer
+    with deadline.watch(FakeResponse()):
+        assert deadline._timer is None
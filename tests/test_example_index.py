@@ -0,0 +1,58 @@
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+import generate_test_case as gtc  # noqa: E402
+from example_index import ExampleIndex, build_index, estimate_tokens  # noqa: E402
+
+HEADERS = ["Test Case ID", "Requirement ID", "Title", "Pre-Conditions", "Test Steps", "Test Data",
+           "Expected Result", "Actual Result", "Status", "Remarks"]
+
+
+def write_training_set(path, rows):
+    wb = openpyxl.Workbook()
+    wb.active.append(HEADERS)
+    for idx, (title, steps) in enumerate(rows, start=1):
+        wb.active.append([f"TC-{idx:03}", f"REQ-{idx}", title, "", steps, "", "Signed in", "", "", ""])
+    wb.save(path)
+
+
+ROWS = [
+    ("Sign in with Apple", "Click Sign in with Apple"),
+    ("Sign in with Google", "Click Sign in with Google"),
+    ("Sign in with email", "Enter the email address and click Continue " * 40),
+    ("Forgot password", "Click Forgot password and reset it"),
+    ("Export report", "Open reports and export as PDF"),
+]
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    train_file = tmp_path / "train.xlsx"
+    write_training_set(train_file, ROWS)
+    index_dir = tmp_path / "index"
+    assert build_index(str(train_file), str(tmp_path / "requirements"), str(index_dir)) == len(ROWS)
+    return index_dir
+
+
+@pytest.mark.parametrize("k, budget", [(1, 600), (2, 600), (3, 40), (5, 1000), (3, 5)])
+def test_select_stays_within_k_and_token_budget(index_dir, k, budget):
+    index = ExampleIndex(str(index_dir))
+    chosen = index.select("Sign in with Apple or Google using email", k=k, token_budget=budget)
+    assert len(chosen) <= k
+    assert sum(estimate_tokens(example["text"]) for example in chosen) <= budget
+
+
+def test_select_prefers_similar_examples(index_dir):
+    chosen = ExampleIndex(str(index_dir)).select("Sign in with Apple", k=1)
+    assert [example["id"] for example in chosen] == ["TC-001"]
+
+
+def test_few_shot_block_picks_up_an_index_built_later(tmp_path, monkeypatch, index_dir):
+    missing_dir = tmp_path / "later"
+    monkeypatch.setattr(gtc, "EXAMPLE_INDEX_DIR", str(missing_dir))
+    assert gtc.few_shot_block({"feature": "Sign in with Apple"}) == ""
+
+    train_file = tmp_path / "train.xlsx"
+    build_index(str(train_file), str(tmp_path / "requirements"), str(missing_dir))
+    assert "TC-001" in gtc.few_shot_block({"feature": "Sign in with Apple"})
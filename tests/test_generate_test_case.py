@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import threading
+import time
+
+import pytest
+
+import generate_test_case as gtc
+from deadline import Deadline
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REQUIREMENT = {"steps": [{"action": "alpha"}, {"action": "beta"}, {"action": "gamma"}]}
+
+
+def steps(*names):
+    return json.dumps([{"test_steps": [f"Do {name}" for name in names]}])
+
+
+class ScriptedModel:
+    """
+    Stands in for gtc.call_model. script maps a variation number to (seconds, text);
+    text=None hangs until the deadline it was given is cancelled.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self.started = []
+        self.cancelled = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, payload, use_stream=True, on_chunk=None, echo=True, stats=None, deadline=None):
+        idx = int(re.search(r"variation #(\d+)", payload["prompt"]).group(1)) - 1
+        with self.lock:
+            self.started.append((idx, self.running))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            seconds, text = self.script[idx]
+            if text is None:
+                deadline.sleep(seconds)
+                self.cancelled.append((idx, deadline.cancelled))
+                return "partial"
+            time.sleep(seconds)
+            return text
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    monkeypatch.chdir(ROOT)  # prompts/prompts.json is read relative to the repository
+
+    def install(script):
+        model = ScriptedModel(script)
+        monkeypatch.setattr(gtc, "call_model", model)
+        return model
+
+    return install
+
+
+def test_first_variation_runs_alone_then_ramps_up(scripted):
+    model = scripted({0: (0.05, steps("alpha")), 1: (0.1, steps("beta")), 2: (0.1, steps("gamma"))})
+    coverage = {}
+    outputs = gtc.generate_until_covered(REQUIREMENT, "v2", workers=2, echo=False, coverage=coverage)
+
+    # Variation 0 started with nothing else running; 1 and 2 were then submitted together
+    assert model.started[0] == (0, 0)
+    assert sorted(idx for idx, _ in model.started[1:]) == [1, 2]
+    assert model.max_running == 2
+    assert len(outputs) == 3
+    assert coverage["coverage"] == 1.0
+    assert coverage["variations"] == 3
+    assert coverage["uncovered"] == []
+
+
+def test_full_coverage_cancels_variations_still_running(scripted):
+    model = scripted({0: (0.05, steps("alpha")), 1: (0.1, steps("beta", "gamma")), 2: (10, None)})
+    deadline = Deadline(60)
+    coverage = {}
+    start = time.perf_counter()
+    outputs = gtc.generate_until_covered(REQUIREMENT, "v2", workers=2, echo=False, coverage=coverage,
+                                         deadline=deadline)
+
+    assert time.perf_counter() - start < 5
+    assert outputs == [steps("alpha"), steps("beta", "gamma")]
+    assert coverage["coverage"] == 1.0
+    assert coverage["variations"] == 2
+    # The executor is not waited on after a cancel; the hung variation returns shortly after
+    for _ in range(100):
+        if model.cancelled:
+            break
+        time.sleep(0.01)
+    assert model.cancelled == [(2, True)]
+    # Only the variations were cancelled, not the caller's deadline
+    assert not deadline.cancelled
+
+
+def test_patience_stops_when_variations_add_nothing(scripted):
+    model = scripted({idx: (0.05, steps("alpha")) for idx in range(6)})
+    coverage = {}
+    outputs = gtc.generate_until_covered(REQUIREMENT, "v2", workers=2, patience=1, echo=False, coverage=coverage)
+
+    # Variation 0 covers alpha; variation 1 and 2 add nothing, so no more are started
+    assert len(model.started) == 3
+    assert len(outputs) == 3
+    assert coverage["covered"] == 1
+    assert [e["text"] for e in coverage["uncovered"]] == ["beta", "gamma"]
+    assert coverage["history"][0] == round(1 / 3, 4)
+
+
+def test_max_cases_bounds_the_variations(scripted):
+    model = scripted({idx: (0.01, steps(name)) for idx, name in enumerate(["alpha", "beta", "gamma"])})
+    outputs = gtc.generate_until_covered(REQUIREMENT, "v2", max_cases=2, echo=False)
+    assert len(model.started) == 2
+    assert len(outputs) == 2
+
+
+def test_requirement_without_elements_still_runs_one_variation(scripted):
+    model = scripted({idx: (0.01, steps("anything")) for idx in range(6)})
+    coverage = {}
+    outputs = gtc.generate_until_covered({"feature": "Sign in"}, "v2", echo=False, coverage=coverage)
+    assert len(model.started) == 1
+    assert len(outputs) == 1
+    assert coverage["elements"] == 0
+    assert coverage["variations"] == 1
+
+
+@pytest.mark.parametrize("use_stream", [True, False])
+def test_cancel_aborts_a_request_still_waiting_for_headers(monkeypatch, use_stream):
+    from mock_backend import start_mock_backend
+
+    # The mock sends no headers until its time to first token has passed
+    server, api_url = start_mock_backend({"slow": {"ttft": 5, "tokens_per_second": 50, "json_valid_rate": 1}}, port=0)
+    monkeypatch.setattr(gtc, "MODEL_API_URL", api_url)
+    deadline = Deadline(60)
+    threading.Timer(0.3, deadline.cancel).start()
+    stats = {}
+    start = time.perf_counter()
+    try:
+        text = gtc.call_model({"model": "slow", "prompt": "p", "stream": use_stream}, use_stream=use_stream,
+                              echo=False, stats=stats, deadline=deadline)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert time.perf_counter() - start < 2
+    assert text == ""
+    assert stats["partial"] is True
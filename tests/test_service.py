@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import generate_test_case as gtc
+import service
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class FakeModel:
+    """
+    Stands in for gtc.call_model: streams `chunks` chunks, stopping early when the
+    job's deadline is cancelled, and counts how often the model was called.
+    """
+
+    def __init__(self, chunks=5, delay=0.05):
+        self.chunks = chunks
+        self.delay = delay
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, payload, use_stream=True, on_chunk=None, echo=True, stats=None, deadline=None):
+        self.calls += 1
+        self.release.wait(5)
+        text = ""
+        for idx in range(self.chunks):
+            if deadline.cancelled:
+                break
+            chunk = f"chunk{idx} "
+            text += chunk
+            if on_chunk:
+                on_chunk(chunk)
+            deadline.sleep(self.delay)
+        return text
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.chdir(ROOT)  # prompts/prompts.json is read relative to the repository
+    model = FakeModel()
+    monkeypatch.setattr(gtc, "call_model", model)
+    server, manager, _ = service.serve(port=0, num_workers=2, poll_system=False)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def request(method, path, body=None, raw=None):
+        data = raw if raw is not None else (None if body is None else json.dumps(body).encode("utf-8"))
+        req = urllib.request.Request(base + path, method=method, data=data)
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                return resp.status, resp.read().decode("utf-8")
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode("utf-8")
+
+    yield request, model, manager
+    model.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def wait_finished(request, job_id):
+    for _ in range(200):
+        status = json.loads(request("GET", f"/jobs/{job_id}")[1])["status"]
+        if status in service.FINISHED:
+            return status
+        threading.Event().wait(0.02)
+    raise AssertionError("job did not finish")
+
+
+JOB = {"requirement": {"feature": "Sign in"}, "mode": "batch"}
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    {"mode": "batch"},
+    {**JOB, "requirement": "Sign in"},
+    {**JOB, "num_cases": 0},
+    {**JOB, "num_cases": 2.5},
+    {**JOB, "use_stream": "false"},
+    {**JOB, "use_examples": 1},
+    {**JOB, "deadline_seconds": True},
+    {**JOB, "version": "v999"},
+    {**JOB, "mode": "serial"},
+])
+def test_invalid_requests_are_rejected(api, body):
+    request, model, _ = api
+    status, _ = request("POST", "/jobs", body)
+    assert status == 400
+    assert model.calls == 0
+
+
+def test_identical_requests_share_one_job(api):
+    request, model, _ = api
+    first = json.loads(request("POST", "/jobs", JOB)[1])
+    second = json.loads(request("POST", "/jobs", JOB)[1])
+    assert second["job_id"] == first["job_id"]
+    assert (first["coalesced"], second["coalesced"]) == (False, True)
+
+    model.release.set()
+    assert wait_finished(request, first["job_id"]) == "done"
+    assert model.calls == 1
+
+
+def test_stream_fans_out_to_every_subscriber(api):
+    request, model, _ = api
+    job_id = json.loads(request("POST", "/jobs", JOB)[1])["job_id"]
+
+    streams = [None, None]
+
+    def read(idx):
+        streams[idx] = [json.loads(line) for line in request("GET", f"/jobs/{job_id}/stream")[1].splitlines()]
+
+    readers = [threading.Thread(target=read, args=(idx,)) for idx in range(2)]
+    for reader in readers:
+        reader.start()
+    model.release.set()
+    for reader in readers:
+        reader.join(10)
+
+    for events in streams:
+        chunks = [e["text"] for e in events if e["event"] == "chunk"]
+        assert "".join(chunks) == "".join(f"chunk{idx} " for idx in range(model.chunks))
+        assert events[-2] == {"event": "status", "status": "done", "error": None}
+        assert events[-1]["event"] == "result"
+        assert events[-1]["finished_at"] is not None
+
+
+def test_delete_only_cancels_after_last_subscriber(api):
+    request, model, _ = api
+    job_id = json.loads(request("POST", "/jobs", JOB)[1])["job_id"]
+    request("POST", "/jobs", JOB)
+
+    first = json.loads(request("DELETE", f"/jobs/{job_id}")[1])
+    assert first["cancelled"] is False
+    assert first["subscribers"] == 1
+
+    second = json.loads(request("DELETE", f"/jobs/{job_id}")[1])
+    assert second["cancelled"] is True
+    model.release.set()
+    assert wait_finished(request, job_id) == "cancelled"
+    assert request("DELETE", "/jobs/unknown")[0] == 404
+
+
+def test_running_out_of_budget_while_running_is_expired(api):
+    request, model, _ = api
+    model.chunks = 40
+    model.release.set()
+    job_id = json.loads(request("POST", "/jobs", {**JOB, "deadline_seconds": 0.3})[1])["job_id"]
+    assert wait_finished(request, job_id) == "expired"
+    result = json.loads(request("GET", f"/jobs/{job_id}/result")[1])
+    assert result["partial"] is True
+    assert result["error"] == "deadline exceeded"
+    assert result["generated_output"][0].startswith("chunk0 ")